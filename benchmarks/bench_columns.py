@@ -0,0 +1,45 @@
+"""
+Compares a query over all blocks, tables and paragraphs on a range of pages that intersect a region, done by walking the tree and with DocumentColumns.select.
+
+    python benchmarks/bench_columns.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document, DocumentColumns
+from synthetic import make_blocks
+
+REGION = (100.0, 100.0, 300.0, 200.0)
+
+
+def walk(doc, first_page, last_page):
+    selected = []
+    for block in doc.root_node.iter_preorder():
+        if block.tag in ['para', 'table'] and first_page <= block.page_idx <= last_page and len(block.bbox) == 4:
+            x0, y0, x1, y1 = block.bbox
+            if x0 <= REGION[2] and x1 >= REGION[0] and y0 <= REGION[3] and y1 >= REGION[1]:
+                selected.append(block)
+    return selected
+
+
+def main():
+    print(f"{'blocks':>10} {'build ms':>10} {'walk ms':>10} {'select ms':>10} {'matches':>10}")
+    for num_sections in [1000, 10000, 50000]:
+        doc = Document(make_blocks(num_sections, bbox=True), keep_json=False)
+        last_page = num_sections // 10
+        first_page = last_page // 4
+        build = min(timeit.repeat(lambda: DocumentColumns(doc.index.blocks), number=1, repeat=3))
+        columns = doc.columns
+        assert walk(doc, first_page, last_page) == columns.select(tags=['para', 'table'], page_range=(first_page, last_page), region=REGION)
+        walk_seconds = min(timeit.repeat(lambda: walk(doc, first_page, last_page), number=1, repeat=5))
+        select_seconds = min(timeit.repeat(lambda: columns.select(tags=['para', 'table'], page_range=(first_page, last_page), region=REGION), number=1, repeat=5))
+        matches = len(walk(doc, first_page, last_page))
+        print(f"{len(columns):>10} {build * 1000:>10.1f} {walk_seconds * 1000:>10.2f} {select_seconds * 1000:>10.2f} {matches:>10}")
+
+
+if __name__ == "__main__":
+    main()
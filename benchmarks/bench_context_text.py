@@ -0,0 +1,60 @@
+"""
+Benchmark for generating to_context_text for every chunk of a document.
+Time per chunk should stay flat as documents and sections grow, and to_context_text of the deepest item of a nested list should grow linearly with its depth.
+
+    python benchmarks/bench_context_text.py
+"""
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document
+from synthetic import make_blocks
+
+
+def nested_list_blocks(depth):
+    blocks = [{"tag": "header", "level": 0, "sentences": ["Article I"]}]
+    blocks += [{"tag": "list_item", "level": level, "sentences": [f"Item {level}"]} for level in range(1, depth + 1)]
+    return blocks
+
+
+def main():
+    print(f"{'sections':>10} {'per sect':>10} {'total ms':>10} {'us/chunk':>10}")
+    for num_sections in [100, 1000, 10000]:
+        for paras_per_section in [3, 30]:
+            doc = Document(make_blocks(num_sections, paras_per_section=paras_per_section, depth=6))
+            chunks = doc.chunks()
+            def run():
+                # a fresh document each time so cached parent texts are not reused between runs
+                for chunk in Document(doc.json).chunks():
+                    chunk.to_context_text()
+            build = min(timeit.repeat(lambda: Document(doc.json).chunks(), number=1, repeat=3))
+            seconds = min(timeit.repeat(run, number=1, repeat=3)) - build
+            print(f"{num_sections:>10} {paras_per_section:>10} {seconds * 1000:>10.1f} {seconds / len(chunks) * 1e6:>10.2f}")
+
+    print(f"{'depth':>10} {'ms':>10} {'peak MB':>10}")
+    for depth in [1000, 3000, 6000]:
+        blocks = nested_list_blocks(depth)
+        best = None
+        for _ in range(3):
+            # a fresh document each time so the texts of the parents are not cached yet
+            item = list(Document(blocks).root_node.iter_preorder())[-1]
+            start = time.perf_counter()
+            item.to_context_text()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        item = list(Document(blocks).root_node.iter_preorder())[-1]
+        tracemalloc.start()
+        item.to_context_text()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{depth:>10} {best * 1000:>10.2f} {peak / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compares loading a document from the parser json with loading it from a file written by save_document, and the time to get a single chunk from a DocumentArchive.
+
+    python benchmarks/bench_document_archive.py
+"""
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document, DocumentArchive, save_document, load_document
+from synthetic import make_blocks
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return Document(json.load(f), keep_json=False)
+
+
+def first_chunk(path):
+    with DocumentArchive(path) as archive:
+        return archive.block(len(archive) // 2).to_context_text()
+
+
+def main():
+    print(f"{'blocks':>10} {'json ms':>10} {'load ms':>10} {'chunk ms':>10} {'json KB':>10} {'archive KB':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "doc.json")
+        archive_path = os.path.join(tmp_dir, "doc.bin")
+        for num_sections in [1000, 10000, 50000]:
+            blocks = make_blocks(num_sections)
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(blocks, f)
+            save_document(Document(blocks), archive_path)
+            json_seconds = min(timeit.repeat(lambda: load_json(json_path), number=1, repeat=3))
+            load_seconds = min(timeit.repeat(lambda: load_document(archive_path), number=1, repeat=3))
+            chunk_seconds = min(timeit.repeat(lambda: first_chunk(archive_path), number=1, repeat=3))
+            print(f"{len(blocks):>10} {json_seconds * 1000:>10.1f} {load_seconds * 1000:>10.1f} {chunk_seconds * 1000:>10.3f} "
+                  f"{os.path.getsize(json_path) / 1024:>10.0f} {os.path.getsize(archive_path) / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
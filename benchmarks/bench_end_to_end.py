@@ -0,0 +1,133 @@
+"""
+Reads pdf urls end to end against benchmarks/fake_parser.py, with read_pdf one at a time, read_pdfs and AsyncLayoutPDFReader.read_pdfs at several concurrencies,
+and reports documents per second, p50 and p99 latency of a document and the peak RSS of the process reading them.
+The parser runs in its own process and every run in a fresh process, so they do not share the GIL or the peak RSS.
+
+    python benchmarks/bench_end_to_end.py --docs 200 --latency 0.05 --jitter 0.02 --num-blocks 2000 --concurrency 1,4,16
+"""
+import argparse
+import asyncio
+import importlib.util
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import LayoutPDFReader, AsyncLayoutPDFReader, Histogram, HistogramSink
+from fake_parser import FakeParserServer, resize_blocks
+from synthetic import make_blocks
+
+
+def serve(num_blocks, latency, jitter, error_rate, urls):
+    blocks = resize_blocks(make_blocks(100), num_blocks)
+    server = FakeParserServer(blocks, latency, jitter, error_rate)
+    urls.put(server.url)
+    server.serve_forever()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux and bytes on macos
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_read_pdf(api_url, pdf_urls, concurrency):
+    reader = LayoutPDFReader(api_url)
+    latencies = Histogram()
+    errors = 0
+    for pdf_url in pdf_urls:
+        start = time.perf_counter()
+        try:
+            reader.read_pdf(pdf_url)
+        except Exception:
+            errors += 1
+        latencies.add(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run_read_pdfs(api_url, pdf_urls, concurrency):
+    sink = HistogramSink()
+    reader = LayoutPDFReader(api_url, pool_maxsize=concurrency, metrics=sink)
+    errors = sum(result.error is not None for result in reader.read_pdfs(pdf_urls, max_workers=concurrency))
+    return sink.histograms["read_pdf.seconds"], errors
+
+
+def run_async_read_pdfs(api_url, pdf_urls, concurrency):
+    latencies = Histogram()
+
+    async def read_all():
+        async with AsyncLayoutPDFReader(api_url, max_connections_per_host=concurrency) as reader:
+            semaphore = asyncio.Semaphore(concurrency)
+            async def read(pdf_url):
+                async with semaphore:
+                    start = time.perf_counter()
+                    try:
+                        await reader.read_pdf(pdf_url)
+                        return 0
+                    except Exception:
+                        return 1
+                    finally:
+                        latencies.add(time.perf_counter() - start)
+            return sum(await asyncio.gather(*[read(pdf_url) for pdf_url in pdf_urls]))
+
+    return latencies, asyncio.run(read_all())
+
+
+RUNS = {"read_pdf": run_read_pdf, "read_pdfs": run_read_pdfs, "async": run_async_read_pdfs}
+
+
+def run(name, api_url, pdf_urls, concurrency, results):
+    start = time.perf_counter()
+    latencies, errors = RUNS[name](api_url, pdf_urls, concurrency)
+    seconds = time.perf_counter() - start
+    results.put((len(pdf_urls) / seconds, latencies.percentile(50), latencies.percentile(99), errors, peak_rss_mb()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100, help="documents read per run")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean seconds the parser takes per document")
+    parser.add_argument("--jitter", type=float, default=0.02, help="seconds the parser latency varies by")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of parse requests that fail with 503")
+    parser.add_argument("--num-blocks", type=int, default=2000, help="blocks in every parser response")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma separated concurrencies of the batch runs")
+    parser.add_argument("--url", help="base url of a running fake parser to use instead of starting one")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    server = None
+    base_url = args.url
+    if base_url is None:
+        urls = context.Queue()
+        server = context.Process(target=serve, args=(args.num_blocks, args.latency, args.jitter, args.error_rate, urls), daemon=True)
+        server.start()
+        base_url = urls.get()
+    api_url = base_url + "/api/parseDocument"
+    pdf_urls = [f"{base_url}/files/{i}.pdf" for i in range(args.docs)]
+
+    runs = [("read_pdf", 1)]
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        runs.append(("read_pdfs", concurrency))
+        if importlib.util.find_spec("aiohttp") is not None:
+            runs.append(("async", concurrency))
+
+    print(f"{'run':>10} {'workers':>8} {'docs/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak MB':>8}")
+    try:
+        for name, concurrency in runs:
+            results = context.Queue()
+            process = context.Process(target=run, args=(name, api_url, pdf_urls, concurrency, results))
+            process.start()
+            docs_per_second, p50, p99, errors, peak_mb = results.get()
+            process.join()
+            print(f"{name:>10} {concurrency:>8} {docs_per_second:>8.1f} {p50 * 1000:>8.1f} {p99 * 1000:>8.1f} {errors:>7} {peak_mb:>8.1f}")
+    finally:
+        if server is not None:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compares decoding a whole parser response with json.loads against decoding it block by block with iter_json_array.
+Reports time to the first block, total time and peak memory while building a Document.
+
+    python benchmarks/bench_json_stream.py
+"""
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document
+from llmsherpa.readers.json_stream import iter_json_array
+from synthetic import make_blocks
+
+CHUNK_SIZE = 64 * 1024
+
+
+def chunks(data):
+    for i in range(0, len(data), CHUNK_SIZE):
+        yield data[i:i + CHUNK_SIZE]
+
+
+def whole(data):
+    # what read_pdf used to do with the response body
+    body = b"".join(chunks(data))
+    blocks = json.loads(body.decode("utf-8"))['return_dict']['result']['blocks']
+    yield from blocks
+
+
+def streamed(data):
+    return iter_json_array(chunks(data), ['return_dict', 'result', 'blocks'])
+
+
+def measure(decode, data):
+    start = time.perf_counter()
+    blocks = iter(decode(data))
+    first_block = next(blocks)
+    first = time.perf_counter() - start
+    Document(itertools.chain([first_block], blocks), keep_json=False)
+    total = time.perf_counter() - start
+    # peak memory is measured in a second run as tracing slows down allocation heavy code
+    tracemalloc.start()
+    Document(decode(data), keep_json=False)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, total, peak
+
+
+def main():
+    print(f"{'MB':>6} {'decoder':>9} {'first block ms':>15} {'total ms':>9} {'peak MB':>8}")
+    for num_sections in [2000, 20000]:
+        data = json.dumps({"return_dict": {"result": {"blocks": make_blocks(num_sections)}}}).encode("utf-8")
+        for name, decode in [("json", whole), ("streamed", streamed)]:
+            first, total, peak = measure(decode, data)
+            print(f"{len(data) / 1e6:>6.1f} {name:>9} {first * 1000:>15.2f} {total * 1000:>9.1f} {peak / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Reports the memory retained per block by a Document, with and without the parser json kept.
+
+    python benchmarks/bench_memory.py
+"""
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document
+from synthetic import make_blocks
+
+
+def retained_bytes(payload, keep_json):
+    tracemalloc.start()
+    # decode inside the trace, the decoded json is what a reader hands to Document
+    doc = Document(json.loads(payload), keep_json=keep_json)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return doc, size
+
+
+def main():
+    print(f"{'blocks':>10} {'keep_json':>10} {'MB':>8} {'bytes/block':>12}")
+    for num_sections in [1000, 10000]:
+        payload = json.dumps(make_blocks(num_sections))
+        for keep_json in [True, False]:
+            doc, size = retained_bytes(payload, keep_json)
+            num_blocks = len(doc.index.blocks)
+            print(f"{num_blocks:>10} {str(keep_json):>10} {size / 1e6:>8.1f} {size / num_blocks:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
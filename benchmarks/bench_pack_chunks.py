@@ -0,0 +1,33 @@
+"""
+Benchmark for packing the chunks of a document into size budgeted chunks.
+Time per chunk should stay flat as documents grow, every chunk is rendered once.
+
+    python benchmarks/bench_pack_chunks.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document
+from synthetic import make_blocks
+
+
+def main():
+    print(f"{'sections':>10} {'max size':>10} {'chunks':>10} {'packed':>10} {'total ms':>10} {'us/chunk':>10}")
+    for num_sections in [100, 1000, 10000]:
+        doc = Document(make_blocks(num_sections, paras_per_section=10, depth=4))
+        chunks = doc.chunks()
+        for max_size in [500, 4000]:
+            def run():
+                # a fresh document each time so cached parent texts are not reused between runs
+                return Document(doc.json).pack_chunks(max_size=max_size)
+            build = min(timeit.repeat(lambda: Document(doc.json), number=1, repeat=3))
+            seconds = min(timeit.repeat(run, number=1, repeat=3)) - build
+            print(f"{num_sections:>10} {max_size:>10} {len(chunks):>10} {len(run()):>10} {seconds * 1000:>10.1f} {seconds / len(chunks) * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Measures how render_documents scales with the number of worker processes on a corpus of synthetic documents, against rendering them one by one in this process.
+Payloads are json text, so the workers also decode the json.
+
+    python benchmarks/bench_render_pipeline.py [number of documents]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import render_document, render_documents
+from synthetic import make_blocks
+
+
+def main():
+    num_documents = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    payloads = [json.dumps(make_blocks(200 + i % 50, paras_per_section=5, depth=4)) for i in range(num_documents)]
+    start = time.perf_counter()
+    for payload in payloads:
+        render_document(payload)
+    serial = time.perf_counter() - start
+    print(f"cpus: {os.cpu_count()}, documents: {num_documents}")
+    print(f"{'workers':>10} {'chunksize':>10} {'seconds':>10} {'docs/sec':>10} {'speedup':>10}")
+    print(f"{'serial':>10} {'':>10} {serial:>10.2f} {num_documents / serial:>10.1f} {1.0:>10.2f}")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        for chunksize in [1, 8]:
+            start = time.perf_counter()
+            for result in render_documents(payloads, max_workers=workers, chunksize=chunksize):
+                assert result.error is None
+            seconds = time.perf_counter() - start
+            print(f"{workers:>10} {chunksize:>10} {seconds:>10.2f} {num_documents / seconds:>10.1f} {serial / seconds:>10.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
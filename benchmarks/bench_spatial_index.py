@@ -0,0 +1,58 @@
+"""
+Compares region queries on a page done by walking the tree with Document.blocks_in_region and Document.block_at, for documents with 100k+ blocks on few large pages and on many small pages.
+
+    python benchmarks/bench_spatial_index.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document, SpatialIndex
+from synthetic import make_blocks
+
+
+def walk(doc, page_idx, region):
+    return [block for block in doc.root_node.iter_preorder()
+            if block.page_idx == page_idx and len(block.bbox) == 4
+            and block.bbox[0] <= region[2] and block.bbox[2] >= region[0] and block.bbox[1] <= region[3] and block.bbox[3] >= region[1]]
+
+
+def build_all(doc, pages):
+    # the tree of a page is built by its first query
+    index = SpatialIndex(doc.index.blocks)
+    for page_idx in pages:
+        index.blocks_in_region(page_idx, (0, 0, 0, 0))
+
+
+def main():
+    random.seed(0)
+    print(f"{'blocks':>10} {'per page':>10} {'build ms':>10} {'walk us':>10} {'query us':>10} {'point us':>10}")
+    for num_sections, blocks_per_page in [(30000, 40), (30000, 4000), (30000, 120000)]:
+        blocks = make_blocks(num_sections)
+        for i, block in enumerate(blocks):
+            # blocks laid out in a grid so large pages have many small boxes
+            row, column = divmod(i % blocks_per_page, 20)
+            block["page_idx"] = i // blocks_per_page
+            block["bbox"] = [column * 30.0, row * 12.0, column * 30.0 + 28, row * 12.0 + 10]
+        doc = Document(blocks, keep_json=False)
+        pages = sorted({block.page_idx for block in doc.index.blocks})
+        queries = []
+        for _ in range(100):
+            page_idx = random.choice(pages)
+            x, y = random.uniform(0, 600), random.uniform(0, 12.0 * blocks_per_page / 20)
+            queries.append((page_idx, (x, y, x + 60, y + 36)))
+        build = min(timeit.repeat(lambda: build_all(doc, pages), number=1, repeat=3))
+        for page_idx, region in queries[:5]:
+            assert doc.blocks_in_region(page_idx, region) == walk(doc, page_idx, region)
+        walk_seconds = min(timeit.repeat(lambda: [walk(doc, p, r) for p, r in queries[:5]], number=1, repeat=3)) / 5
+        query_seconds = min(timeit.repeat(lambda: [doc.blocks_in_region(p, r) for p, r in queries], number=1, repeat=3)) / len(queries)
+        point_seconds = min(timeit.repeat(lambda: [doc.block_at(p, r[0], r[1]) for p, r in queries], number=1, repeat=3)) / len(queries)
+        print(f"{len(doc.index.blocks):>10} {blocks_per_page:>10} {build * 1000:>10.1f} {walk_seconds * 1e6:>10.0f} {query_seconds * 1e6:>10.1f} {point_seconds * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Times the phases of reading a document, LayoutReader.read, Document with its top sections, chunks, to_context_text of every chunk, to_text and to_html,
+on synthetic documents of growing size, and appends the results to a history file, benchmarks/history.jsonl by default, which git ignores.
+
+Every run is compared with the previous run of the same phase and size on the same machine in the history, and the time per block of the largest size with the smallest,
+so a phase that got slower or stopped scaling linearly is flagged right away. Like timeit, the garbage collector is off while a phase is timed,
+its pauses grow with the number of live objects and would hide the scaling of the code itself.
+
+    python benchmarks/bench_suite.py --sizes 1000,10000,100000,1000000
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document, LayoutReader
+from synthetic import make_document
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.jsonl")
+
+
+def phases(blocks):
+    """
+    Returns a list of (phase, setup, run) where run(setup()) is timed. Phases that cache results on the blocks get a fresh document from setup.
+    """
+    def document():
+        return Document(blocks)
+
+    def chunks(doc):
+        return doc, doc.chunks()
+
+    return [
+        ("read", lambda: None, lambda _: LayoutReader().read(blocks)),
+        ("document", lambda: None, lambda _: Document(blocks)),
+        ("chunks", document, lambda doc: doc.chunks()),
+        ("context_text", lambda: chunks(document()), lambda doc_chunks: [chunk.to_context_text() for chunk in doc_chunks[1]]),
+        ("to_text", document, lambda doc: doc.to_text()),
+        ("to_html", document, lambda doc: doc.to_html()),
+    ]
+
+
+def best_seconds(setup, run, repeat):
+    best = None
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run(state)
+            seconds = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated numbers of blocks")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="json lines file the results are appended to")
+    parser.add_argument("--threshold", type=float, default=1.2, help="flag phases this many times slower than the previous run")
+    parser.add_argument("--scaling", type=float, default=2.0, help="flag phases whose time per block grows this many times from the smallest to the largest size")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="phases faster than this are too noisy to be flagged")
+    parser.add_argument("--no-save", action="store_true", help="compare with the history without appending to it")
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    run_info = {"time": datetime.datetime.now().isoformat(timespec="seconds"), "commit": git_commit(), "python": platform.python_version(), "machine": platform.node()}
+    previous = {}
+    for record in load_history(args.history):
+        # timings are only comparable on the same machine
+        if record["machine"] == run_info["machine"]:
+            previous[(record["phase"], record["blocks"])] = record["seconds"]
+
+    records = []
+    flags = []
+    print(f"{'phase':>14} {'blocks':>10} {'ms':>10} {'us/block':>10} {'previous':>10}")
+    for num_blocks in sizes:
+        blocks = make_document(num_blocks)
+        # large documents take seconds per phase, one repeat is enough there
+        repeat = 3 if num_blocks <= 100000 else 1
+        for phase, setup, run in phases(blocks):
+            seconds = best_seconds(setup, run, repeat)
+            change = ""
+            if (phase, num_blocks) in previous:
+                ratio = seconds / previous[(phase, num_blocks)]
+                change = f"{(ratio - 1) * 100:+.0f}%"
+                if ratio > args.threshold and seconds * 1000 >= args.min_ms:
+                    flags.append(f"{phase} at {num_blocks} blocks is {ratio:.2f}x slower than the previous run")
+            print(f"{phase:>14} {num_blocks:>10} {seconds * 1000:>10.1f} {seconds / num_blocks * 1e6:>10.2f} {change:>10}")
+            records.append(dict(run_info, phase=phase, blocks=num_blocks, seconds=seconds))
+
+    if len(sizes) > 1:
+        for phase, _, _ in phases([]):
+            timed = [record for record in records if record["phase"] == phase and record["seconds"] * 1000 >= args.min_ms]
+            if len(timed) < 2:
+                continue
+            smallest, largest = timed[0], timed[-1]
+            growth = (largest["seconds"] / largest["blocks"]) / (smallest["seconds"] / smallest["blocks"])
+            if growth > args.scaling:
+                flags.append(f"{phase} takes {growth:.1f}x longer per block at {largest['blocks']} than at {smallest['blocks']} blocks")
+
+    if not args.no_save:
+        with open(args.history, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+    for flag in flags:
+        print("REGRESSION:", flag)
+    return 1 if flags else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
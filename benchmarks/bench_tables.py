@@ -0,0 +1,55 @@
+"""
+Compares building a table heavy document with the table rows built lazily, as Document does, and eagerly, i.e. with rows and headers of every table accessed right after construction.
+Memory is what the Document adds on top of the decoded parser json.
+
+    python benchmarks/bench_tables.py
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document
+from synthetic import make_blocks, make_table
+
+
+def make_document_blocks(num_sections):
+    # a table after every section header besides the paragraphs
+    blocks = []
+    for block in make_blocks(num_sections, paras_per_section=2, depth=1):
+        blocks.append(block)
+        if block["tag"] == "header":
+            blocks.append(make_table(len(blocks), block["page_idx"], num_rows=40, num_cols=8))
+    return blocks
+
+
+def build(payload, eager):
+    blocks_json = json.loads(payload)
+    tracemalloc.start()
+    start = time.perf_counter()
+    doc = Document(blocks_json)
+    if eager:
+        for table in doc.tables():
+            table.headers
+            table.rows
+    seconds = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return doc, seconds, size
+
+
+def main():
+    print(f"{'tables':>8} {'mode':>6} {'build ms':>10} {'MB':>8}")
+    for num_sections in [100, 1000]:
+        payload = json.dumps(make_document_blocks(num_sections))
+        for eager in [True, False]:
+            doc, seconds, size = min((build(payload, eager) for _ in range(3)), key=lambda result: result[1])
+            print(f"{len(doc.tables()):>8} {'eager' if eager else 'lazy':>6} {seconds * 1000:>10.1f} {size / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
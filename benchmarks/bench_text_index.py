@@ -0,0 +1,52 @@
+"""
+Compares keyword lookups done with a regex over Document.to_text with lookups in the TextIndex, and the cost of building the index while the document is read.
+Phrase lookups in large tables are timed as well, they should not grow faster than the number of rows.
+
+    python benchmarks/bench_text_index.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document
+from synthetic import make_blocks, make_table
+
+# words in every block and in every paragraph, and phrases that match a few blocks
+QUERIES = ["section", "sentence", "section 777", "paragraph 2 of section 777"]
+
+
+def regex_scan(doc, query):
+    return len(re.findall(r"\b" + re.escape(query) + r"\b", doc.to_text(), re.IGNORECASE))
+
+
+def main():
+    print(f"{'blocks':>10} {'read ms':>10} {'indexed ms':>11}  {'query':<28} {'hits':>8} {'regex ms':>10} {'lookup ms':>10}")
+    for num_sections in [1000, 10000, 50000]:
+        blocks = make_blocks(num_sections)
+        read_seconds = min(timeit.repeat(lambda: Document(blocks, keep_json=False), number=1, repeat=3))
+        indexed_seconds = min(timeit.repeat(lambda: Document(blocks, keep_json=False, text_index=True), number=1, repeat=3))
+        doc = Document(blocks, keep_json=False, text_index=True)
+        for query in QUERIES:
+            regex_seconds = min(timeit.repeat(lambda: regex_scan(doc, query), number=1, repeat=3))
+            lookup_seconds = min(timeit.repeat(lambda: doc.text_index.search_phrase(query), number=1, repeat=3))
+            hits = len(doc.text_index.search_phrase(query))
+            print(f"{len(blocks):>10} {read_seconds * 1000:>10.1f} {indexed_seconds * 1000:>11.1f}  {query:<28} {hits:>8} {regex_seconds * 1000:>10.1f} {lookup_seconds * 1000:>10.3f}")
+
+    print(f"{'rows':>10} {'indexed ms':>11}  {'query':<28} {'hits':>8} {'lookup ms':>10}")
+    for num_rows in [200, 2000, 20000]:
+        blocks = [{"tag": "header", "level": 0, "sentences": ["Results"]}, make_table(1, 0, num_rows=num_rows, num_cols=8)]
+        indexed_seconds = min(timeit.repeat(lambda: Document(blocks, text_index=True), number=1, repeat=3))
+        doc = Document(blocks, text_index=True)
+        # the cells are numbers like 12.3, so 0 and 4 occur in many rows
+        for query in ["column 3", "0 4"]:
+            lookup_seconds = min(timeit.repeat(lambda: doc.text_index.search_phrase(query), number=1, repeat=3))
+            hits = len(doc.text_index.search_phrase(query))
+            print(f"{num_rows:>10} {indexed_seconds * 1000:>11.1f}  {query:<28} {hits:>8} {lookup_seconds * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Scaling benchmark for Document construction, which includes computing the top sections.
+Time per section should stay flat as the number of sections grows.
+
+    python benchmarks/bench_top_sections.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document
+from synthetic import make_blocks
+
+
+def main():
+    print(f"{'sections':>10} {'total ms':>10} {'us/section':>12}")
+    for num_sections in [500, 1000, 2000, 4000, 8000, 16000]:
+        blocks = make_blocks(num_sections)
+        repeat = max(1, 16000 // num_sections)
+        seconds = min(timeit.repeat(lambda: Document(blocks), number=1, repeat=repeat))
+        print(f"{num_sections:>10} {seconds * 1000:>10.1f} {seconds / num_sections * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
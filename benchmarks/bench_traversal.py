@@ -0,0 +1,59 @@
+"""
+Compares Block.iter_preorder with the recursive visitor it replaced, on a wide tree and on deeply nested lists.
+The recursive visitor fails with RecursionError once nesting goes past the recursion limit.
+
+    python benchmarks/bench_traversal.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llmsherpa.readers import Document
+from synthetic import make_blocks
+
+
+def recursive_visit(node, node_visitor):
+    for child in node.children:
+        node_visitor(child)
+        recursive_visit(child, node_visitor)
+
+
+def recursive_blocks(root):
+    blocks = []
+    recursive_visit(root, blocks.append)
+    return blocks
+
+
+def nested_list_blocks(depth, width):
+    blocks = [{"tag": "header", "level": 0, "sentences": ["Article I"]}]
+    for i in range(width):
+        for level in range(1, depth + 1):
+            blocks.append({"tag": "list_item", "level": level, "sentences": [f"{i}.{level}"]})
+    return blocks
+
+
+def timed(fn):
+    try:
+        return f"{min(timeit.repeat(fn, number=1, repeat=5)) * 1000:.1f}"
+    except RecursionError:
+        return "RecursionError"
+
+
+def main():
+    trees = [
+        ("wide 10k sections", make_blocks(10000)),
+        ("nested lists depth 50", nested_list_blocks(50, 200)),
+        ("nested lists depth 5000", nested_list_blocks(5000, 2)),
+    ]
+    print(f"{'tree':>26} {'blocks':>8} {'recursive ms':>14} {'iterative ms':>14}")
+    for name, blocks in trees:
+        root = Document(blocks).root_node
+        iterative = lambda: list(root.iter_preorder())
+        print(f"{name:>26} {len(blocks):>8} {timed(lambda: recursive_blocks(root)):>14} {timed(iterative):>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Stand-in for the parser API to load test LayoutPDFReader without a live parser. Every POST is answered with the same recorded blocks after a configurable latency,
+GET requests serve a small pdf so urls can be read too.
+
+    python benchmarks/fake_parser.py --port 5010 --latency 0.2 --jitter 0.05 --error-rate 0.01 --num-blocks 5000
+
+The blocks are a parser response or a list of blocks saved as json, e.g. a response captured from a live parser, and default to synthetic blocks.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_blocks
+
+
+def load_blocks(path):
+    """
+    Returns the blocks saved at path, either a whole parser response or a list of blocks.
+    """
+    with open(path) as f:
+        blocks = json.load(f)
+    if isinstance(blocks, dict):
+        blocks = blocks['return_dict']['result']['blocks']
+    return blocks
+
+
+def resize_blocks(blocks, num_blocks):
+    """
+    Returns num_blocks blocks by repeating or truncating blocks, with block_idx and page_idx of the repeats continued after the previous copy.
+    """
+    resized = []
+    block_offset = 0
+    page_offset = 0
+    while len(resized) < num_blocks:
+        for block in blocks[:num_blocks - len(resized)]:
+            block = dict(block)
+            block['block_idx'] = block.get('block_idx', 0) + block_offset
+            block['page_idx'] = block.get('page_idx', 0) + page_offset
+            resized.append(block)
+        block_offset = resized[-1]['block_idx'] + 1
+        page_offset = resized[-1]['page_idx'] + 1
+    return resized
+
+
+class FakeParserHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.send_body(200, b"%PDF-1.4 " + self.path.encode("utf-8") + b"\n%%EOF", "application/pdf")
+
+    def do_POST(self):
+        server = self.server
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining > 0:
+            remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+        with server.lock:
+            delay = max(server.latency + server.random.uniform(-server.jitter, server.jitter), 0.0)
+            failed = server.random.random() < server.error_rate
+            server.requests += 1
+            server.errors += failed
+        time.sleep(delay)
+        if failed:
+            self.send_body(server.error_status, b"", "text/plain")
+        else:
+            self.send_body(200, server.response, "application/json")
+
+
+class FakeParserServer(ThreadingHTTPServer):
+    """
+    HTTP server that answers parser API requests with recorded blocks.
+
+    Parameters
+    ----------
+    blocks: list
+        blocks returned for every parse request
+    latency: float
+        mean seconds between receiving a request and responding
+    jitter: float
+        the latency of a request varies uniformly by up to this many seconds
+    error_rate: float
+        fraction of parse requests that fail with error_status
+    error_status: int
+        HTTP status of failed requests, 503 by default so LayoutPDFReader retries them
+    host: str
+        address to listen on
+    port: int
+        port to listen on, 0 picks a free port
+    seed: int
+        seed of the latencies and errors so runs are repeatable
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, blocks, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, host="127.0.0.1", port=0, seed=0):
+        super().__init__((host, port), FakeParserHandler)
+        self.response = json.dumps({"return_dict": {"result": {"blocks": blocks}}}).encode("utf-8")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        base url of the server, the parser api can be any path below it
+        """
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self):
+        """
+        Serves requests in a background thread.
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5010)
+    parser.add_argument("--blocks", help="json file with a parser response or a list of blocks")
+    parser.add_argument("--num-blocks", type=int, help="repeat or truncate the blocks to this many")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean seconds per parse request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds the latency varies by")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of failed parse requests")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    blocks = load_blocks(args.blocks) if args.blocks else make_blocks(100)
+    if args.num_blocks:
+        blocks = resize_blocks(blocks, args.num_blocks)
+    server = FakeParserServer(blocks, args.latency, args.jitter, args.error_rate, args.error_status, args.host, args.port, args.seed)
+    print(f"serving {len(blocks)} blocks at {server.url}/api/parseDocument", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Synthetic parser output for benchmarks.
+"""
+import random
+
+
+def make_blocks(num_sections, paras_per_section=3, depth=3, bbox=False):
+    """
+    Returns blocks_json with num_sections headers nested up to depth levels, each followed by paras_per_section paragraphs.
+    If bbox is True, then the blocks of a page are given bounding boxes stacked from the top of a 612x792 page.
+    """
+    blocks = []
+    for i in range(num_sections):
+        level = i % depth
+        blocks.append({
+            "tag": "header",
+            "level": level,
+            "page_idx": i // 10,
+            "block_idx": len(blocks),
+            "sentences": [f"Section {i}"],
+        })
+        for j in range(paras_per_section):
+            blocks.append({
+                "tag": "para",
+                "level": level + 1,
+                "page_idx": i // 10,
+                "block_idx": len(blocks),
+                "sentences": [f"Paragraph {j} of section {i}.", "It has a second sentence."],
+            })
+    if bbox:
+        rows = {}
+        for block in blocks:
+            row = rows.get(block["page_idx"], 0)
+            rows[block["page_idx"]] = row + 1
+            top = 20 + (row * 25) % 750
+            block["bbox"] = [50.0, float(top), 560.0, float(top + 20)]
+    return blocks
+
+
+def make_table(block_idx, page_idx, level=1, num_rows=10, num_cols=5):
+    """
+    Returns the block of a table with a header row and num_rows rows of num_cols cells.
+    """
+    rows = [{"type": "table_header", "cells": [{"col_span": 1, "cell_value": f"Column {c}"} for c in range(num_cols)]}]
+    for r in range(num_rows):
+        rows.append({"type": "table_data_row", "cells": [{"col_span": 1, "cell_value": f"{r * c}.{c}"} for c in range(num_cols)]})
+    return {"tag": "table", "level": level, "page_idx": page_idx, "block_idx": block_idx, "name": f"Table {block_idx}", "sentences": [], "table_rows": rows}
+
+
+def make_document(num_blocks, section_depth=4, list_depth=3, table_rate=0.02, table_rows=10, table_cols=5, blocks_per_page=40, seed=0):
+    """
+    Returns blocks_json of about num_blocks blocks that mix sections, paragraphs, nested lists and tables like a long report.
+
+    Parameters
+    ----------
+    num_blocks: int
+        number of blocks returned
+    section_depth: int
+        headers are nested up to this many levels, a header is at most one level below the previous one
+    list_depth: int
+        list items are nested up to this many levels
+    table_rate: float
+        about this fraction of blocks are tables
+    table_rows: int
+        number of rows of a table besides its header row
+    table_cols: int
+        number of cells of a table row
+    blocks_per_page: int
+        number of blocks on a page
+    seed: int
+        seed of the random structure so runs are repeatable
+    """
+    rng = random.Random(seed)
+    blocks = []
+    section_level = 0
+    while len(blocks) < num_blocks:
+        page_idx = len(blocks) // blocks_per_page
+        choice = rng.random()
+        if not blocks or choice < 0.1:
+            section_level = rng.randint(0, min(section_level + 1, section_depth - 1)) if blocks else 0
+            blocks.append({"tag": "header", "level": section_level, "page_idx": page_idx, "block_idx": len(blocks),
+                           "sentences": [f"Section {len(blocks)}"]})
+        elif choice < 0.1 + table_rate:
+            blocks.append(make_table(len(blocks), page_idx, section_level + 1, table_rows, table_cols))
+        elif choice < 0.18 + table_rate:
+            list_level = 0
+            for _ in range(min(rng.randint(2, 8), num_blocks - len(blocks))):
+                list_level = rng.randint(0, min(list_level + 1, list_depth - 1))
+                blocks.append({"tag": "list_item", "level": section_level + 1 + list_level, "page_idx": page_idx, "block_idx": len(blocks),
+                               "sentences": [f"Item {len(blocks)} at depth {list_level}."]})
+        else:
+            blocks.append({"tag": "para", "level": section_level + 1, "page_idx": page_idx, "block_idx": len(blocks),
+                           "sentences": [f"Sentence {s} of paragraph {len(blocks)} with a few more words." for s in range(rng.randint(1, 4))]})
+    return blocks
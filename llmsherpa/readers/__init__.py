@@ -1,2 +1,10 @@
 from .layout_reader import *
-from .file_reader import LayoutPDFReader
\ No newline at end of file
+from .parse_cache import ParseCache
+from .file_reader import LayoutPDFReader, ReadResult
+from .async_file_reader import AsyncLayoutPDFReader
+from .document_archive import DocumentArchive, save_document, load_document
+from .render_pipeline import render_document, render_documents, RenderedChunk, RenderedDocument, RenderResult
+from .instrumentation import MetricsSink, HistogramSink, Histogram
+from .document_columns import DocumentColumns
+from .spatial_index import SpatialIndex
+from .text_index import TextIndex, TextHit
\ No newline at end of file
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import json
+from urllib.parse import urlparse
+from llmsherpa.readers import Document
+from llmsherpa.readers.file_reader import ReadResult
+from llmsherpa.readers.optional_dependencies import _optional_import
+
+
+class AsyncLayoutPDFReader:
+    """
+    asyncio version of LayoutPDFReader. Reads PDF content and understands hierarchical layout of the document sections and structural components such as paragraphs, sentences, tables, lists, sublists
+    Requires aiohttp, install it with pip install llmsherpa[async]
+
+    Parameters
+    ----------
+    parser_api_url: str
+        API url for LLM Sherpa. Use customer url for your private instance here
+    max_connections_per_host: int
+        maximum number of requests in flight to any single host, covers both the parser and the servers pdfs are downloaded from
+    executor: concurrent.futures.Executor
+        executor that decodes parser responses and builds the documents, so the CPU work of a large response does not stall the event loop and the other reads in flight.
+        None uses the default executor of the event loop. It has to be a thread pool since the documents are returned to the loop.
+    keep_json: bool
+        If True, then the documents keep the parser json, see Document
+    """
+    def __init__(self, parser_api_url, max_connections_per_host=8, executor=None, keep_json=True):
+        """
+            Constructs an AsyncLayoutPDFReader from a parser endpoint.
+
+            Parameters
+            ----------
+            parser_api_url: str
+                API url for LLM Sherpa. Use customer url for your private instance here
+            max_connections_per_host: int
+                maximum number of requests in flight to any single host
+            executor: concurrent.futures.Executor
+                thread pool that decodes responses and builds documents, the default executor of the loop if None
+            keep_json: bool
+                keep the parser json in the documents
+        """
+        # fails early with the pip command if aiohttp is missing
+        _optional_import("aiohttp", "async")
+        self.parser_api_url = parser_api_url
+        self.max_connections_per_host = max_connections_per_host
+        self.executor = executor
+        self.keep_json = keep_json
+        # the session and semaphores are created lazily as they have to belong to the running event loop
+        self.session = None
+        self.host_semaphores = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the connections held by the reader.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        if self.session is None:
+            aiohttp = _optional_import("aiohttp", "async")
+            connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.max_connections_per_host)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self.host_semaphores[host]
+
+    async def _download_pdf(self, pdf_url):
+        # some servers only allow browers user_agent to download
+        user_agent = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/77.0.3865.90 Safari/537.36"
+        download_headers = {"User-Agent": user_agent}
+        async with self._host_semaphore(pdf_url):
+            async with self._get_session().get(pdf_url, headers=download_headers) as download_response:
+                if download_response.status != 200:
+                    raise ValueError(f"Failed to download {pdf_url}, status {download_response.status}")
+                file_data = await download_response.read()
+        file_name = os.path.basename(urlparse(pdf_url).path)
+        return (file_name, file_data, 'application/pdf')
+
+    async def _parse_pdf(self, pdf_file):
+        file_name, file_data, content_type = pdf_file
+        form = _optional_import("aiohttp", "async").FormData()
+        form.add_field('file', file_data, filename=file_name, content_type=content_type)
+        async with self._host_semaphore(self.parser_api_url):
+            async with self._get_session().post(self.parser_api_url, data=form) as parser_response:
+                response_data = await parser_response.read()
+                if parser_response.status > 200:
+                    raise ValueError(f"{response_data}")
+        return response_data
+
+    async def _load_pdf(self, path_or_url, contents=None):
+        # file contents were given
+        if contents is not None:
+            return (path_or_url, contents, 'application/pdf')
+        is_url = (urlparse(path_or_url).scheme in ["http", "https"])
+        if is_url:
+            return await self._download_pdf(path_or_url)
+        def read_file():
+            with open(path_or_url, "rb") as f:
+                return f.read()
+        file_data = await asyncio.get_running_loop().run_in_executor(None, read_file)
+        return (os.path.basename(path_or_url), file_data, 'application/pdf')
+
+    async def read_pdf(self, path_or_url, contents=None):
+        """
+        Reads pdf from a url or path
+
+        Parameters
+        ----------
+        path_or_url: str
+            path or url to the pdf file e.g. https://someexapmple.com/myfile.pdf or /home/user/myfile.pdf
+        contents: bytes
+            contents of the pdf file. If contents is given, path_or_url is ignored.
+        """
+        pdf_file = await self._load_pdf(path_or_url, contents)
+        response_data = await self._parse_pdf(pdf_file)
+        def build_document():
+            response_json = json.loads(response_data)
+            return Document(response_json['return_dict']['result']['blocks'], keep_json=self.keep_json)
+        # decoding and building the tree are CPU bound, they run off the event loop like reading local files
+        return await asyncio.get_running_loop().run_in_executor(self.executor, build_document)
+
+    async def _read_result(self, path_or_url):
+        try:
+            return ReadResult(path_or_url, await self.read_pdf(path_or_url), None)
+        except Exception as e:
+            return ReadResult(path_or_url, None, e)
+
+    async def read_pdfs(self, paths_or_urls, max_in_flight=64, ordered=False):
+        """
+        Reads many pdfs concurrently from urls or paths. Per host concurrency is still bounded by max_connections_per_host.
+        A failure in one pdf does not stop the batch, it is reported in the error of its result instead.
+
+        Parameters
+        ----------
+        paths_or_urls: iterable of str
+            paths or urls to the pdf files, consumed only as fast as results are produced
+        max_in_flight: int
+            maximum number of pdfs submitted but not yet yielded
+        ordered: bool
+            If True, then results are yielded in the order of paths_or_urls. If False, then results are yielded as soon as they are done.
+
+        Returns
+        -------
+        async iterator of ReadResult
+            one (path_or_url, document, error) result per input
+        """
+        inputs = iter(paths_or_urls)
+        pending = []
+        def submit_next():
+            for path_or_url in inputs:
+                pending.append(asyncio.ensure_future(self._read_result(path_or_url)))
+                return True
+            return False
+
+        try:
+            while len(pending) < max(max_in_flight, 1) and submit_next():
+                pass
+            while pending:
+                if ordered:
+                    done = [await pending[0]]
+                    pending.pop(0)
+                else:
+                    finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    done = []
+                    for task in finished:
+                        pending.remove(task)
+                        done.append(task.result())
+                for result in done:
+                    submit_next()
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,324 @@
+import array
+import json
+import mmap
+import struct
+import sys
+from llmsherpa.readers.layout_reader import Block, Paragraph, Section, ListItem, Table, Document
+
+MAGIC = b"LSHDOC01"
+_HEADER_SIZE = struct.Struct("<I")
+_ALIGNMENT = 8
+_BLOCK_CLASSES = {'para': Paragraph, 'header': Section, 'list_item': ListItem}
+
+def _block_fields(block):
+    # only the fields that differ from the defaults of Block
+    fields = {}
+    for name, default in [('tag', None), ('level', -1), ('page_idx', -1), ('block_idx', -1), ('top', -1), ('left', -1)]:
+        if getattr(block, name) != default:
+            fields[name] = getattr(block, name)
+    if block.bbox:
+        fields['bbox'] = list(block.bbox)
+    if block.sentences:
+        fields['sentences'] = list(block.sentences)
+    return fields
+
+def _cell_json(cell):
+    cell_json = _block_fields(cell)
+    cell_json['col_span'] = cell.col_span
+    cell_json['cell_value'] = cell.cell_value if cell.cell_node is None else _block_fields(cell.cell_node)
+    return cell_json
+
+def _table_extras(table):
+    # table rows are stored as json, rebuilt from the row objects so compacted tables can be saved as well
+    table_rows = []
+    for header in table.headers:
+        header_json = _block_fields(header)
+        header_json.update({'type': 'table_header', 'cells': [_cell_json(cell) for cell in header.cells]})
+        table_rows.append(header_json)
+    for row in table.rows:
+        table_rows.append({'type': 'table_data_row', 'cells': [_cell_json(cell) for cell in row.cells]})
+    return {'name': table.name, 'table_rows': table_rows}
+
+def save_document(document, path):
+    """
+    Saves the layout tree of a document to a binary file that can be loaded with load_document or DocumentArchive without parsing json.
+    Blocks are stored as flat arrays in document order with the index of their parent, tags are stored once in a tag table and sentences in a string table shared by all blocks.
+    block_json of the blocks and fields the blocks do not keep, such as block_class, are not saved.
+
+    Parameters
+    ----------
+    document: Document
+        document to save, it can have been read with keep_json False
+    path: str
+        path of the file to write
+    """
+    blocks = document.index.blocks
+    positions = {id(block): i for i, block in enumerate(blocks)}
+    tag_codes = {}
+    string_ids = {}
+    strings = bytearray()
+    columns = {
+        'tags': array.array('H'), 'levels': array.array('i'), 'page_indices': array.array('i'), 'block_indices': array.array('i'),
+        'parents': array.array('i'), 'ends': array.array('i', bytes(4 * len(blocks))), 'tops': array.array('d'), 'lefts': array.array('d'),
+        'bbox_starts': array.array('q', [0]), 'bboxes': array.array('d'),
+        'sentence_starts': array.array('q', [0]), 'sentence_ids': array.array('i'),
+        'string_starts': array.array('q', [0]), 'strings': None,
+        'extra_starts': array.array('q', [0]), 'extras': None,
+    }
+    extras = bytearray()
+    for block in blocks:
+        columns['tags'].append(tag_codes.setdefault(block.tag, len(tag_codes)))
+        columns['levels'].append(block.level)
+        columns['page_indices'].append(block.page_idx)
+        columns['block_indices'].append(block.block_idx)
+        columns['parents'].append(positions[id(block.parent)] if id(block.parent) in positions else -1)
+        columns['tops'].append(block.top)
+        columns['lefts'].append(block.left)
+        columns['bboxes'].extend(block.bbox)
+        columns['bbox_starts'].append(len(columns['bboxes']))
+        for sentence in block.sentences:
+            if sentence not in string_ids:
+                string_ids[sentence] = len(string_ids)
+                strings += sentence.encode("utf-8")
+                columns['string_starts'].append(len(strings))
+            columns['sentence_ids'].append(string_ids[sentence])
+        columns['sentence_starts'].append(len(columns['sentence_ids']))
+        if isinstance(block, Table):
+            extras += json.dumps(_table_extras(block), separators=(",", ":")).encode("utf-8")
+        columns['extra_starts'].append(len(extras))
+    # blocks are in document order, so the descendants of a block are the blocks up to the end of its last child
+    ends = columns['ends']
+    for i in range(len(blocks) - 1, -1, -1):
+        children = blocks[i].children
+        ends[i] = ends[positions[id(children[-1])]] if children else i + 1
+    columns['strings'] = array.array('B', strings)
+    columns['extras'] = array.array('B', extras)
+
+    layout = {}
+    offset = 0
+    for name, values in columns.items():
+        layout[name] = [values.typecode, offset, len(values)]
+        offset += -(-len(values) * values.itemsize // _ALIGNMENT) * _ALIGNMENT
+    header = json.dumps({
+        'byteorder': sys.byteorder,
+        'num_blocks': len(blocks),
+        'tags': list(tag_codes),
+        'columns': layout,
+    }).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_SIZE.pack(len(header)))
+        f.write(header)
+        f.write(bytes(-f.tell() % _ALIGNMENT))
+        for name, values in columns.items():
+            data = values.tobytes()
+            f.write(data)
+            f.write(bytes(-len(data) % _ALIGNMENT))
+
+def load_document(path):
+    """
+    Loads a document saved with save_document. The document is the same as one read from the parser json with keep_json False.
+    """
+    with DocumentArchive(path) as archive:
+        return archive.document()
+
+class DocumentArchive:
+    """
+    Read only view of a document saved with save_document. The file is memory mapped and the block arrays are used in place, Block objects are only built when they are asked for.
+    Use it as a context manager or call close when done. Blocks that were built stay valid after the archive is closed.
+
+    Parameters
+    ----------
+    path: str
+        path of a file written by save_document
+
+    Attributes
+    ----------
+    tag_names: list
+        tags used in the document, tags[i] is an index into tag_names
+    tags, levels, page_indices, block_indices, parents: sequence of int
+        fields of every block in document order. parents[i] is the index of the parent block or -1 for top level blocks.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        try:
+            self._open()
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self):
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a document archive")
+        header_size, = _HEADER_SIZE.unpack_from(self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + _HEADER_SIZE.size
+        header = json.loads(self._mmap[header_start:header_start + header_size].decode("utf-8"))
+        data_start = header_start + header_size + (-(header_start + header_size) % _ALIGNMENT)
+        self.tag_names = [sys.intern(tag) if tag is not None else None for tag in header['tags']]
+        buffer = memoryview(self._mmap)
+        self._views.append(buffer)
+        for name, (typecode, offset, length) in header['columns'].items():
+            start = data_start + offset
+            view = buffer[start:start + length * array.array(typecode).itemsize]
+            self._views.append(view)
+            if header['byteorder'] == sys.byteorder:
+                values = view.cast(typecode)
+                self._views.append(values)
+            else:
+                values = array.array(typecode, view)
+                values.byteswap()
+            setattr(self, name, values)
+        self._num_blocks = header['num_blocks']
+        self._nodes = [None] * self._num_blocks
+        self._complete = bytearray(self._num_blocks)
+        self._strings = [None] * (len(self.string_starts) - 1)
+        self._root = Block()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """
+        Unmaps the file. The arrays of the archive can not be used afterwards.
+        """
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __len__(self):
+        return self._num_blocks
+
+    def tag(self, i):
+        """
+        Returns the tag of the block at index i.
+        """
+        return self.tag_names[self.tags[i]]
+
+    def sentences(self, i):
+        """
+        Returns the sentences of the block at index i without building the block. Equal sentences are decoded once and shared.
+        """
+        return [self._string(sentence_id) for sentence_id in self.sentence_ids[self.sentence_starts[i]:self.sentence_starts[i + 1]]]
+
+    def _string(self, string_id):
+        string = self._strings[string_id]
+        if string is None:
+            string = bytes(self.strings[self.string_starts[string_id]:self.string_starts[string_id + 1]]).decode("utf-8")
+            self._strings[string_id] = string
+        return string
+
+    def _build(self, i, columns):
+        # columns is the archive itself, or a copy of its arrays as lists when many blocks are built at once
+        tag = self.tag_names[columns.tags[i]]
+        sentences = tuple([self._strings[string_id] for string_id in columns.sentence_ids[columns.sentence_starts[i]:columns.sentence_starts[i + 1]]])
+        if tag == 'table':
+            block_json = {
+                'tag': tag,
+                'level': columns.levels[i],
+                'page_idx': columns.page_indices[i],
+                'block_idx': columns.block_indices[i],
+                'top': columns.tops[i],
+                'left': columns.lefts[i],
+                'bbox': columns.bboxes[columns.bbox_starts[i]:columns.bbox_starts[i + 1]],
+                'sentences': sentences,
+            }
+            block_json.update(json.loads(bytes(self.extras[columns.extra_starts[i]:columns.extra_starts[i + 1]]).decode("utf-8")))
+            node = Table(block_json, None)
+            node.compact()
+            return node
+        # the fields are set directly as they are already in the compacted form, this skips the json dict a constructor needs
+        cls = _BLOCK_CLASSES[tag]
+        node = cls.__new__(cls)
+        node.tag = tag
+        node.level = columns.levels[i]
+        node.page_idx = columns.page_indices[i]
+        node.block_idx = columns.block_indices[i]
+        node.top = columns.tops[i]
+        node.left = columns.lefts[i]
+        node.bbox = tuple(columns.bboxes[columns.bbox_starts[i]:columns.bbox_starts[i + 1]])
+        node.sentences = sentences
+        node.children = []
+        node.parent = None
+        node.block_json = None
+        node._context = None
+        if cls is Section:
+            node.title = "\n".join(sentences)
+        return node
+
+    def _node(self, i):
+        # builds the block and any of its ancestors that were not built yet, without their children
+        chain = []
+        k = i
+        while k >= 0 and self._nodes[k] is None:
+            chain.append(k)
+            k = self.parents[k]
+        for k in reversed(chain):
+            for string_id in self.sentence_ids[self.sentence_starts[k]:self.sentence_starts[k + 1]]:
+                self._string(string_id)
+            node = self._build(k, self)
+            parent = self.parents[k]
+            node.parent = self._root if parent < 0 else self._nodes[parent]
+            self._nodes[k] = node
+        return self._nodes[i]
+
+    def _link(self, start, end, parents):
+        # gives the blocks in start:end that were not completed before their children, all blocks in the range must be built
+        complete = self._complete
+        nodes = self._nodes
+        for k in range(start, end):
+            if not complete[k]:
+                nodes[k].children = []
+        for k in range(start + 1, end):
+            parent = parents[k]
+            if parent >= 0 and not complete[parent]:
+                nodes[parent].children.append(nodes[k])
+        complete[start:end] = b"\x01" * (end - start)
+
+    def block(self, i):
+        """
+        Returns the block at index i in document order with all its descendants. Blocks are built on first access and the same object is returned afterwards.
+        The parent chain of the block is built too, so parent_text and to_context_text work, but an ancestor only gets its children once it is asked for itself.
+        """
+        end = self.ends[i]
+        for k in range(i, end):
+            self._node(k)
+        self._link(i, end, self.parents)
+        return self._nodes[i]
+
+    def document(self):
+        """
+        Builds and returns the whole document. The arrays are copied to lists and all the strings are decoded in one go, which is faster than building the blocks one by one.
+        """
+        columns = _Columns(self)
+        strings = bytes(self.strings)
+        string_starts = self.string_starts.tolist()
+        for string_id, string in enumerate(self._strings):
+            if string is None:
+                self._strings[string_id] = strings[string_starts[string_id]:string_starts[string_id + 1]].decode("utf-8")
+        nodes = self._nodes
+        root = self._root
+        parents = columns.parents
+        # a parent comes before its children in document order, so it is always built first
+        for i in range(self._num_blocks):
+            if nodes[i] is None:
+                node = self._build(i, columns)
+                parent = parents[i]
+                node.parent = root if parent < 0 else nodes[parent]
+                nodes[i] = node
+        self._link(0, self._num_blocks, parents)
+        root.children = [nodes[i] for i in range(self._num_blocks) if parents[i] < 0]
+        return Document.from_tree(root)
+
+class _Columns:
+    """
+    The block arrays of a DocumentArchive copied to lists, which are faster to index than the memory mapped arrays.
+    """
+    def __init__(self, archive):
+        for name in ['tags', 'levels', 'page_indices', 'block_indices', 'parents', 'tops', 'lefts', 'bbox_starts', 'bboxes', 'sentence_starts', 'sentence_ids', 'extra_starts']:
+            setattr(self, name, getattr(archive, name).tolist())
@@ -0,0 +1,124 @@
+import array
+import math
+from llmsherpa.readers.optional_dependencies import _optional_import
+
+class DocumentColumns:
+    """
+    Columnar view of all the blocks of a document, one row per block in the order of DocumentIndex.blocks. The columns are contiguous arrays, so queries over many blocks do not have to walk the tree.
+    With numpy installed, to_numpy returns the columns as numpy arrays without copying them and select is vectorized.
+
+    Attributes
+    ----------
+    blocks: list
+        the block of each row
+    tag_names: list
+        distinct tags of the blocks, the tags column holds indexes into it
+    tags, levels, page_indices, block_indices: array of int
+        tag code, level, page_idx and block_idx of every block
+    parents: array of int
+        row of the parent of every block, -1 for blocks whose parent is the root
+    bboxes: array of float
+        bounding box of every block as 4 consecutive values x0, y0, x1, y1. Blocks without a bounding box of 4 values have nan.
+    sentence_starts: array of int
+        the sentences of row i are sentence_starts[i] up to sentence_starts[i + 1]
+    sentence_offsets: array of int
+        sentence j is text[sentence_offsets[j]:sentence_offsets[j + 1]]
+    text: str
+        sentences of all blocks concatenated
+    """
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.tag_names = []
+        tag_codes = {}
+        self.tags = array.array('i')
+        self.levels = array.array('i')
+        self.page_indices = array.array('i')
+        self.block_indices = array.array('i')
+        self.parents = array.array('i')
+        self.bboxes = array.array('d')
+        self.sentence_starts = array.array('q', [0])
+        self.sentence_offsets = array.array('q', [0])
+        rows = {id(block): i for i, block in enumerate(blocks)}
+        sentences = []
+        offset = 0
+        no_bbox = [math.nan] * 4
+        for block in blocks:
+            if block.tag not in tag_codes:
+                tag_codes[block.tag] = len(self.tag_names)
+                self.tag_names.append(block.tag)
+            self.tags.append(tag_codes[block.tag])
+            self.levels.append(block.level)
+            self.page_indices.append(block.page_idx)
+            self.block_indices.append(block.block_idx)
+            self.parents.append(rows.get(id(block.parent), -1))
+            self.bboxes.extend(block.bbox if len(block.bbox) == 4 else no_bbox)
+            for sentence in block.sentences:
+                sentences.append(sentence)
+                offset += len(sentence)
+                self.sentence_offsets.append(offset)
+            self.sentence_starts.append(len(sentences))
+        self.text = "".join(sentences)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def sentences(self, i):
+        """
+        Returns the sentences of the block in row i.
+        """
+        offsets = self.sentence_offsets[self.sentence_starts[i]:self.sentence_starts[i + 1] + 1]
+        return [self.text[start:end] for start, end in zip(offsets, offsets[1:])]
+
+    def to_numpy(self, name):
+        """
+        Returns a column as a numpy array that shares memory with the column. bboxes are returned with shape (number of blocks, 4).
+        """
+        numpy = _optional_import("numpy", "numpy")
+        column = getattr(self, name)
+        values = numpy.frombuffer(column, dtype=column.typecode) if len(column) > 0 else numpy.zeros(0, dtype=column.typecode)
+        if name == 'bboxes':
+            values = values.reshape(-1, 4)
+        return values
+
+    def select(self, tags=None, page_range=None, region=None):
+        """
+        Returns the blocks that match all the given conditions, in document order. The conditions are evaluated on whole columns with numpy if it is installed.
+
+        Parameters
+        ----------
+        tags: collection of str
+            If given, then only blocks with these tags are returned
+        page_range: (int, int)
+            If given, then only blocks with first <= page_idx <= last are returned
+        region: (float, float, float, float)
+            If given as (x0, y0, x1, y1), then only blocks whose bounding box intersects the region are returned. Blocks without a bounding box never match.
+        """
+        codes = None if tags is None else [i for i, tag in enumerate(self.tag_names) if tag in tags]
+        try:
+            numpy = _optional_import("numpy", "numpy")
+        except ImportError:
+            numpy = None
+        if numpy is not None:
+            mask = numpy.ones(len(self.blocks), dtype=bool)
+            if codes is not None:
+                mask &= numpy.isin(self.to_numpy('tags'), codes)
+            if page_range is not None:
+                page_indices = self.to_numpy('page_indices')
+                mask &= (page_indices >= page_range[0]) & (page_indices <= page_range[1])
+            if region is not None:
+                bboxes = self.to_numpy('bboxes')
+                mask &= (bboxes[:, 0] <= region[2]) & (bboxes[:, 2] >= region[0]) & (bboxes[:, 1] <= region[3]) & (bboxes[:, 3] >= region[1])
+            return [self.blocks[i] for i in numpy.flatnonzero(mask)]
+        codes = None if codes is None else set(codes)
+        bboxes = self.bboxes
+        selected = []
+        for i in range(len(self.blocks)):
+            if codes is not None and self.tags[i] not in codes:
+                continue
+            if page_range is not None and not page_range[0] <= self.page_indices[i] <= page_range[1]:
+                continue
+            # comparisons with nan are False, so blocks without a bounding box are left out
+            if region is not None and not (bboxes[4 * i] <= region[2] and bboxes[4 * i + 2] >= region[0] and bboxes[4 * i + 1] <= region[3] and bboxes[4 * i + 3] >= region[1]):
+                continue
+            selected.append(self.blocks[i])
+        return selected
@@ -1,8 +1,115 @@
 import urllib3
+import hashlib
+import io
+import itertools
 import os
-import json
+import random
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from urllib.parse import urlparse
-from llmsherpa.readers import Document
+from urllib3.fields import RequestField
+from urllib3.filepost import choose_boundary
+from llmsherpa.readers import Document, LayoutReader
+from llmsherpa.readers.json_stream import iter_json_array
+from llmsherpa.readers.instrumentation import metrics_recorder
+from llmsherpa.readers.optional_dependencies import _optional_import
+
+
+
+ReadResult = namedtuple("ReadResult", ["path_or_url", "document", "error"])
+ReadResult.__doc__ = """
+Result of reading one pdf in a batch with LayoutPDFReader.read_pdfs
+
+Attributes
+----------
+path_or_url: str
+    path or url of the pdf as given to read_pdfs
+document: Document
+    parsed document or None if reading failed
+error: Exception
+    exception raised while reading the pdf or None if reading succeeded
+"""
+
+# statuses returned by overloaded or restarting parser replicas and proxies in front of them
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+DEFAULT_TIMEOUT = urllib3.Timeout(connect=10.0, read=600.0)
+# retries are done by LayoutPDFReader so a retry can go to another parser url, urllib3 only follows redirects
+_NO_RETRY = urllib3.Retry(total=None, connect=0, read=0, other=0, status=0, redirect=5)
+
+class _MultipartFileBody:
+    """
+    multipart/form-data body with a single file field that is produced chunk by chunk instead of being built in memory.
+    The body can be iterated more than once so urllib3 can resend it when it retries a request.
+    """
+    def __init__(self, pdf_file, chunk_size):
+        file_name, self.data, content_type = pdf_file
+        self.chunk_size = chunk_size
+        boundary = choose_boundary()
+        field = RequestField.from_tuples("file", (file_name, b"", content_type))
+        self.head = f"--{boundary}\r\n".encode("latin-1") + field.render_headers().encode("utf-8")
+        self.tail = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        if hasattr(self.data, "read"):
+            self.data_start = self.data.tell()
+            self.data_size = self.data.seek(0, os.SEEK_END) - self.data_start
+            self.data.seek(self.data_start)
+        else:
+            self.data_size = len(self.data)
+
+    def __len__(self):
+        return len(self.head) + self.data_size + len(self.tail)
+
+    def __iter__(self):
+        yield self.head
+        if hasattr(self.data, "read"):
+            self.data.seek(self.data_start)
+            while True:
+                chunk = self.data.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            data = memoryview(self.data)
+            for start in range(0, len(data), self.chunk_size):
+                yield data[start:start + self.chunk_size]
+        yield self.tail
+
+def _rebase_block(block_json, block_offset, page_offset):
+    """
+    Adds the offsets to block_idx and page_idx of a block parsed as part of a shard, including the rows and cells of tables. Unknown indexes of -1 are kept.
+    """
+    stack = [block_json]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            if value.get('block_idx', -1) >= 0:
+                value['block_idx'] += block_offset
+            if value.get('page_idx', -1) >= 0:
+                value['page_idx'] += page_offset
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+
+class _TimedIterator:
+    """
+    Iterator that adds up the time spent getting its items in seconds.
+    """
+    def __init__(self, iterable):
+        self.iterator = iter(iterable)
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return next(self.iterator)
+        finally:
+            self.seconds += time.perf_counter() - start
 
 class LayoutPDFReader:
     """
@@ -10,22 +117,122 @@ class LayoutPDFReader:
 
     Parameters
     ----------
-    parser_api_url: str
-        API url for LLM Sherpa. Use customer url for your private instance here            
-    
+    parser_api_url: str or list of str
+        API url for LLM Sherpa. Use customer url for your private instance here. With a list of urls of parser replicas, requests are sent to them in turn and a retry goes to the next one.
+    cache: ParseCache
+        optional cache of parser results. Pdfs with the same contents are parsed only once per parser_api_url.
+    chunk_size: int
+        size in bytes of the chunks pdfs are downloaded and uploaded in. Pdfs are streamed from disk or a temporary file so memory used per request is bounded by this and not by the size of the pdf.
+    timeout: urllib3.Timeout or float
+        connect and read timeouts of downloads and parser requests. The read timeout bounds the wait for every read from the socket, not the whole request. Defaults to DEFAULT_TIMEOUT, 10 seconds to connect and 600 seconds per read.
+    retries: int
+        number of times a request is retried after a connection error, a timeout or a response with a status in RETRY_STATUSES. Downloads and parsing a pdf are idempotent so both are retried.
+    backoff_factor: float
+        retry n waits a random time between 0 and backoff_factor * 2 ** n seconds, or longer if the server sent a Retry-After header
+    max_backoff: float
+        maximum wait in seconds before a retry
+    pool_maxsize: int
+        number of connections kept open per host. Set it to at least the number of threads using the reader, e.g. max_workers of read_pdfs.
+    metrics: MetricsSink or function
+        If given, then the time and bytes of every phase of reading a pdf and the counts of the documents are recorded to it, see llmsherpa.readers.MetricsSink for the metrics
+    pages_per_shard: int
+        If given, then pdfs with more pages are split into shards of this many pages that are parsed concurrently, e.g. by several parser replicas, and their blocks are joined again. Requires pypdf, install it with pip install llmsherpa[shard].
+    max_shard_workers: int
+        maximum number of shards of a pdf parsed at the same time
+    single_flight: bool
+        If True, then concurrent read_pdf calls for the same url or the same pdf contents share one download and one parse, and each caller gets its own Document built from the shared blocks.
+        The shared blocks are received in full before any of the documents are built.
+    keep_json: bool
+        If True, then the documents keep the parser json in Document.json and in block_json of every block. If False, then the blocks are released as soon as the tree is built
+        and the blocks are compacted, see Document, so a document from a streamed response never holds all the decoded json at once.
     """
-    def __init__(self, parser_api_url):
+    def __init__(self, parser_api_url, cache=None, chunk_size=1024 * 1024, timeout=DEFAULT_TIMEOUT, retries=3, backoff_factor=0.5, max_backoff=30.0, pool_maxsize=10, metrics=None, pages_per_shard=None, max_shard_workers=4, single_flight=False, keep_json=True):
         """
             Constructs a LayoutPDFReader from a parser endpoint.
 
             Parameters
             ----------
-            parser_api_url: str
-                API url for LLM Sherpa. Use customer url for your private instance here            
+            parser_api_url: str or list of str
+                API url for LLM Sherpa. Use customer url for your private instance here. A list of urls of parser replicas is used in turn.
+            cache: ParseCache
+                optional cache of parser results, see llmsherpa.readers.ParseCache
+            chunk_size: int
+                size in bytes of the chunks pdfs are downloaded and uploaded in
+            timeout: urllib3.Timeout or float
+                connect and read timeouts of requests
+            retries: int
+                number of times a failed request is retried
+            backoff_factor: float
+                base of the exponential backoff between retries in seconds
+            max_backoff: float
+                maximum wait in seconds before a retry
+            pool_maxsize: int
+                number of connections kept open per host
+            metrics: MetricsSink or function
+                receives the measurements of the reader
+            pages_per_shard: int
+                number of pages of a shard when large pdfs are split for parsing
+            max_shard_workers: int
+                maximum number of shards of a pdf parsed at the same time
+            single_flight: bool
+                share the work of concurrent reads of the same pdf
+            keep_json: bool
+                keep the parser json in the documents
         """
-        self.parser_api_url = parser_api_url
-        self.download_connection = urllib3.PoolManager()
-        self.api_connection = urllib3.PoolManager()
+        if pages_per_shard is not None:
+            # fails early with the pip command if pypdf is missing
+            _optional_import("pypdf", "shard")
+        self.parser_api_urls = [parser_api_url] if isinstance(parser_api_url, str) else list(parser_api_url)
+        # cache entries are keyed by the first url, all the urls should run the same parser
+        self.parser_api_url = self.parser_api_urls[0]
+        self.cache = cache
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self._url_counter = itertools.count()
+        self.metrics = metrics
+        self._record = metrics_recorder(metrics)
+        self.pages_per_shard = pages_per_shard
+        self.max_shard_workers = max_shard_workers
+        self.single_flight = single_flight
+        self.keep_json = keep_json
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self.download_connection = urllib3.PoolManager(maxsize=pool_maxsize, timeout=timeout, retries=_NO_RETRY)
+        self.api_connection = urllib3.PoolManager(maxsize=pool_maxsize, timeout=timeout, retries=_NO_RETRY)
+
+    def _next_parser_api_url(self):
+        return self.parser_api_urls[next(self._url_counter) % len(self.parser_api_urls)]
+
+    def _backoff(self, attempt, response=None):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, min(self.max_backoff, float(retry_after)))
+        time.sleep(delay)
+
+    def _request(self, connection, method, next_url, **kwargs):
+        """
+        Sends a request with retries and returns the response with its body not read yet. next_url is called for the url of every attempt.
+        The response of the last attempt is returned even if its status is in RETRY_STATUSES, the error of the last attempt is raised if it failed.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = connection.request(method, next_url(), preload_content=False, **kwargs)
+            except urllib3.exceptions.HTTPError:
+                if attempt >= self.retries:
+                    raise
+                response = None
+            else:
+                if response.status not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                response.drain_conn()
+                response.release_conn()
+            self._backoff(attempt, response)
+            attempt += 1
 
     def _download_pdf(self, pdf_url):
         
@@ -33,28 +240,45 @@ class LayoutPDFReader:
         user_agent = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/77.0.3865.90 Safari/537.36"
         # add authorization headers if using external API (see upload_pdf for an example)
         download_headers = {"User-Agent": user_agent}
-        download_response = self.download_connection.request("GET", pdf_url, headers=download_headers)
+        start = time.perf_counter()
+        download_response = self._request(self.download_connection, "GET", lambda: pdf_url, headers=download_headers)
         file_name = os.path.basename(urlparse(pdf_url).path)
         # note you can change the file name here if you'd like to something else
-        if download_response.status == 200:
-            pdf_file = (file_name, download_response.data, 'application/pdf')
+        try:
+            if download_response.status != 200:
+                raise ValueError(f"Failed to download {pdf_url}, status {download_response.status}")
+            # small pdfs stay in memory, larger ones are spooled to a temporary file chunk by chunk
+            file_data = tempfile.SpooledTemporaryFile(max_size=self.chunk_size)
+            try:
+                for chunk in download_response.stream(self.chunk_size):
+                    file_data.write(chunk)
+            except BaseException:
+                file_data.close()
+                raise
+            if self._record is not None:
+                self._record("download.seconds", time.perf_counter() - start)
+                self._record("download.bytes", file_data.tell())
+            file_data.seek(0)
+        finally:
+            download_response.release_conn()
+        pdf_file = (file_name, file_data, 'application/pdf')
         return pdf_file
 
     def _parse_pdf(self, pdf_file):
         auth_header = {}
-        parser_response = self.api_connection.request("POST", self.parser_api_url, fields={'file': pdf_file})
+        body = _MultipartFileBody(pdf_file, self.chunk_size)
+        headers = {"Content-Type": body.content_type, "Content-Length": str(len(body))}
+        start = time.perf_counter()
+        # the body is produced again from the pdf for every attempt
+        parser_response = self._request(self.api_connection, "POST", self._next_parser_api_url, body=body, headers=headers)
+        if self._record is not None:
+            self._record("parse.seconds", time.perf_counter() - start)
+            self._record("parse.upload_bytes", len(body))
         return parser_response
 
-    def read_pdf(self, path_or_url, contents=None):
+    def _load_pdf(self, path_or_url, contents=None):
         """
-        Reads pdf from a url or path
-
-        Parameters
-        ----------
-        path_or_url: str
-            path or url to the pdf file e.g. https://someexapmple.com/myfile.pdf or /home/user/myfile.pdf
-        contents: bytes
-            contents of the pdf file. If contents is given, path_or_url is ignored. This is useful when you already have the pdf file contents in memory such as if you are using streamlit or flask.
+        Returns a (file_name, data, content_type) tuple for the pdf where data is either bytes or an open binary file that the caller has to close.
         """
         # file contents were given
         if contents is not None:
@@ -65,12 +289,287 @@ class LayoutPDFReader:
                 pdf_file = self._download_pdf(path_or_url)
             else:
                 file_name = os.path.basename(path_or_url)
-                with open(path_or_url, "rb") as f:
-                    file_data = f.read()
-                    pdf_file = (file_name, file_data, 'application/pdf')
+                pdf_file = (file_name, open(path_or_url, "rb"), 'application/pdf')
+        return pdf_file
+
+    def _read_blocks(self, pdf_file):
+        """
+        Sends the pdf to the parser and returns an iterator over the blocks in its response. Blocks are decoded one at a time as the response body arrives.
+        """
         parser_response = self._parse_pdf(pdf_file)
         if parser_response.status > 200:
-            raise ValueError(f"{parser_response.data}")
-        response_json = json.loads(parser_response.data.decode("utf-8"))
-        blocks = response_json['return_dict']['result']['blocks']
-        return Document(blocks)
+            error = parser_response.data
+            parser_response.release_conn()
+            raise ValueError(f"{error}")
+        return self._iter_blocks(parser_response)
+
+    def _iter_blocks(self, parser_response):
+        response_bytes = 0
+        def stream():
+            nonlocal response_bytes
+            for chunk in parser_response.stream(self.chunk_size):
+                response_bytes += len(chunk)
+                yield chunk
+        try:
+            yield from iter_json_array(stream(), ['return_dict', 'result', 'blocks'])
+        finally:
+            parser_response.release_conn()
+            if self._record is not None:
+                self._record("parse.response_bytes", response_bytes)
+
+    def _split_pdf(self, pdf_file):
+        """
+        Returns (pdf, first pages of the shards, first shard) for a pdf with more than pages_per_shard pages, or None if it is not larger than a shard or pypdf cannot split it.
+        Only the first shard is built here, to check that the pdf can be split. The others are built when they are sent.
+        """
+        file_data = pdf_file[1]
+        start = file_data.tell() if hasattr(file_data, "read") else None
+        try:
+            pdf = _optional_import("pypdf", "shard").PdfReader(file_data if start is not None else io.BytesIO(file_data))
+            if pdf.is_encrypted or len(pdf.pages) <= self.pages_per_shard:
+                return None
+            first_shard = self._build_shard(pdf, pdf_file, 0)
+        except Exception:
+            # pypdf raises many kinds of errors for pdfs it cannot read, the parser may still read them whole
+            return None
+        finally:
+            if start is not None:
+                file_data.seek(start)
+        return pdf, list(range(0, len(pdf.pages), self.pages_per_shard)), first_shard
+
+    def _build_shard(self, pdf, pdf_file, first_page):
+        """
+        Returns a (file_name, data, content_type) tuple for the pages of pdf from first_page on, at most pages_per_shard of them.
+        """
+        file_name, _, content_type = pdf_file
+        writer = _optional_import("pypdf", "shard").PdfWriter()
+        for page in pdf.pages[first_page:first_page + self.pages_per_shard]:
+            writer.add_page(page)
+        shard_data = io.BytesIO()
+        writer.write(shard_data)
+        base_name, extension = os.path.splitext(file_name)
+        return (f"{base_name}_{first_page}{extension}", shard_data.getvalue(), content_type)
+
+    def _read_shards(self, pdf_file, pdf, first_pages, first_shard):
+        """
+        Sends the shards of a pdf to the parser concurrently and returns an iterator over the blocks of all the shards in page order.
+        A shard is built by the worker that sends it, so at most max_shard_workers shards are in memory. The iterator closes pdf_file when it is done.
+        """
+        # pypdf reads the pdf through one file, so the shards are built one at a time
+        lock = threading.Lock()
+        closed = threading.Event()
+        def read_shard(first_page, shard):
+            if shard is None:
+                with lock:
+                    if closed.is_set():
+                        raise ValueError("the pdf was closed before all its shards were sent")
+                    shard = self._build_shard(pdf, pdf_file, first_page)
+            return list(self._read_blocks(shard))
+        executor = ThreadPoolExecutor(max_workers=max(min(self.max_shard_workers, len(first_pages)), 1))
+        futures = [executor.submit(read_shard, first_page, first_shard if first_page == 0 else None) for first_page in first_pages]
+        del first_shard
+        # the submitted shards still run, the threads exit when they are done
+        executor.shutdown(wait=False)
+        def close():
+            with lock:
+                closed.set()
+                if hasattr(pdf_file[1], "close"):
+                    pdf_file[1].close()
+        return self._iter_shard_blocks(first_pages, futures, close)
+
+    def _iter_shard_blocks(self, first_pages, futures, close):
+        block_offset = 0
+        try:
+            for first_page, future in zip(first_pages, futures):
+                next_offset = block_offset
+                for block in future.result():
+                    _rebase_block(block, block_offset, first_page)
+                    next_offset = max(next_offset, block.get('block_idx', -1) + 1)
+                    yield block
+                block_offset = next_offset
+        finally:
+            for future in futures:
+                future.cancel()
+            close()
+
+    def _parse_blocks(self, pdf_file):
+        """
+        Returns (blocks, closes_pdf) where blocks is an iterator over the blocks of the pdf returned by the parser, from one request or from concurrent requests for its shards.
+        If closes_pdf is True, then the shards are still being built from pdf_file and the iterator closes it when it is done.
+        """
+        split = self._split_pdf(pdf_file) if self.pages_per_shard is not None else None
+        if split is None:
+            return self._read_blocks(pdf_file), False
+        return self._read_shards(pdf_file, *split), True
+
+    def _get_blocks(self, path_or_url, contents=None):
+        """
+        Returns the blocks for the pdf from the cache or an iterator over the blocks as they are decoded from the parser response.
+        """
+        pdf_file = self._load_pdf(path_or_url, contents)
+        closes_pdf = False
+        try:
+            if self.cache is None:
+                blocks, closes_pdf = self._parse_blocks(pdf_file)
+            else:
+                cache_key = self.cache.key(pdf_file[1], self.parser_api_url, self.chunk_size)
+                blocks = self.cache.get(cache_key)
+                if self._record is not None:
+                    self._record("cache.hits" if blocks is not None else "cache.misses", 1)
+                if blocks is None:
+                    blocks, _ = self._parse_blocks(pdf_file)
+                    start = time.perf_counter()
+                    blocks = list(blocks)
+                    if self._record is not None:
+                        self._record("decode.seconds", time.perf_counter() - start)
+                    self.cache.put(cache_key, blocks)
+        finally:
+            if not closes_pdf and hasattr(pdf_file[1], "close"):
+                pdf_file[1].close()
+        return blocks
+
+    def _flight_key(self, path_or_url, contents=None):
+        """
+        Returns the key of reads that can share their result, the url for urls and a hash of the contents for contents and local files.
+        """
+        if contents is None and urlparse(path_or_url).scheme in ["http", "https"]:
+            return ("url", path_or_url)
+        digest = hashlib.sha256()
+        if contents is not None:
+            digest.update(contents)
+        else:
+            with open(path_or_url, "rb") as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                    digest.update(chunk)
+        return ("contents", digest.hexdigest())
+
+    def _get_shared_blocks(self, path_or_url, contents=None):
+        """
+        Returns the list of blocks for the pdf. The first caller for a pdf reads the blocks, callers arriving while it is in flight wait for its result or its error.
+        """
+        key = self._flight_key(path_or_url, contents)
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if not leader:
+            if self._record is not None:
+                self._record("single_flight.shared", 1)
+            return future.result()
+        try:
+            blocks = self._get_blocks(path_or_url, contents)
+            if not isinstance(blocks, list):
+                start = time.perf_counter()
+                blocks = list(blocks)
+                if self._record is not None:
+                    self._record("decode.seconds", time.perf_counter() - start)
+            future.set_result(blocks)
+            return blocks
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+
+    def read_pdf(self, path_or_url, contents=None):
+        """
+        Reads pdf from a url or path
+
+        Parameters
+        ----------
+        path_or_url: str
+            path or url to the pdf file e.g. https://someexapmple.com/myfile.pdf or /home/user/myfile.pdf
+        contents: bytes
+            contents of the pdf file. If contents is given, path_or_url is ignored. This is useful when you already have the pdf file contents in memory such as if you are using streamlit or flask.
+
+        The response of the parser is decoded block by block while the document tree is built, so the whole response is never held in memory at once.
+        If the reader has a cache, the parser is only called when the cache has no entry for the pdf contents. Urls are still downloaded as the cache is keyed by contents.
+        If the reader is single_flight, then concurrent calls for the same url or contents share one download and parse.
+        """
+        get_blocks = self._get_shared_blocks if self.single_flight else self._get_blocks
+        if self._record is None:
+            return Document(get_blocks(path_or_url, contents), keep_json=self.keep_json)
+        start = time.perf_counter()
+        blocks = get_blocks(path_or_url, contents)
+        # blocks from a cache or shared with other calls are a list that was already decoded
+        from_cache = isinstance(blocks, list)
+        if not from_cache:
+            blocks = _TimedIterator(blocks)
+        build_start = time.perf_counter()
+        document = Document(blocks, keep_json=self.keep_json, metrics=self.metrics)
+        end = time.perf_counter()
+        decode_seconds = 0.0 if from_cache else blocks.seconds
+        if not from_cache:
+            self._record("decode.seconds", decode_seconds)
+        self._record("build.seconds", end - build_start - decode_seconds)
+        self._record("read_pdf.seconds", end - start)
+        return document
+
+    def iter_chunks(self, path_or_url, contents=None):
+        """
+        Reads pdf from a url or path and yields its chunks as soon as they are complete, while later blocks are still being received from the parser.
+        Takes the same parameters as read_pdf. Yields (chunk, sections) tuples where sections is the list of sections the chunk is in, outermost first.
+        """
+        return LayoutReader().iter_chunks(self._get_blocks(path_or_url, contents))
+
+    def _read_result(self, path_or_url):
+        try:
+            return ReadResult(path_or_url, self.read_pdf(path_or_url), None)
+        except Exception as e:
+            return ReadResult(path_or_url, None, e)
+
+    def read_pdfs(self, paths_or_urls, max_workers=4, max_in_flight=None, ordered=False):
+        """
+        Reads many pdfs concurrently from urls or paths. Downloads, uploads to the parser and decoding of responses overlap across a pool of worker threads sharing the connection pools of this reader.
+        A failure in one pdf does not stop the batch, it is reported in the error of its result instead.
+
+        Parameters
+        ----------
+        paths_or_urls: iterable of str
+            paths or urls to the pdf files. This can be a lazy iterable such as a generator, it is consumed only as fast as results are produced.
+        max_workers: int
+            number of pdfs read at the same time. Set this close to the number of parser replicas behind parser_api_url, and pool_maxsize of the reader to at least this.
+        max_in_flight: int
+            maximum number of pdfs submitted but not yet yielded. It bounds the memory held by finished documents waiting to be consumed. Defaults to 2 * max_workers.
+            If it is less than max_workers, then only max_in_flight pdfs are read at the same time.
+        ordered: bool
+            If True, then results are yielded in the order of paths_or_urls. If False, then results are yielded as soon as they are done.
+
+        Returns
+        -------
+        iterator of ReadResult
+            one (path_or_url, document, error) result per input
+        """
+        if max_in_flight is None:
+            max_in_flight = 2 * max_workers
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be at least 1, got {max_in_flight}")
+        inputs = iter(paths_or_urls)
+        # more workers than pdfs in flight would never be busy
+        with ThreadPoolExecutor(max_workers=min(max_workers, max_in_flight)) as executor:
+            pending = deque()
+            def submit_next():
+                for path_or_url in inputs:
+                    pending.append(executor.submit(self._read_result, path_or_url))
+                    return True
+                return False
+
+            try:
+                while len(pending) < max_in_flight and submit_next():
+                    pass
+                while pending:
+                    if ordered:
+                        done = [pending.popleft()]
+                    else:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            pending.remove(future)
+                    for future in done:
+                        submit_next()
+                        yield future.result()
+            finally:
+                # caller stopped early, do not start work nobody will consume
+                for future in pending:
+                    future.cancel()
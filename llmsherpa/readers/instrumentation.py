@@ -0,0 +1,129 @@
+import math
+import threading
+
+class MetricsSink:
+    """
+    Receives the measurements of LayoutPDFReader and Document. Subclass it and implement record, or pass any function taking (name, value) instead. The base class ignores all values.
+
+    Metrics recorded by LayoutPDFReader.read_pdf:
+
+    - download.seconds, download.bytes: downloading a pdf from a url
+    - parse.upload_bytes: size of the request sent to the parser
+    - parse.seconds: from sending the pdf to the parser until the response headers arrive, i.e. upload and parsing
+    - decode.seconds, parse.response_bytes: receiving and decoding the blocks of the parser response
+    - cache.hits, cache.misses: 1 for every lookup in the cache of the reader
+    - single_flight.shared: 1 for every read of a single_flight reader that waited for the same pdf read by another call
+    - build.seconds: building the layout tree and the top sections, without the time spent decoding
+    - read_pdf.seconds: the whole read_pdf call
+
+    Metrics recorded by Document when it is given a sink:
+
+    - document.seconds: building the document, including reading blocks_json if it is an iterator
+    - document.blocks, document.sections, document.tables, document.chunks: counts of the document
+    """
+    def record(self, name, value):
+        """
+        Records a value of the metric. This is a virtual method and should be implemented by the derived classes. It is called from the threads reading documents, so it has to be thread safe.
+        """
+        pass
+
+def metrics_recorder(metrics):
+    """
+    Returns a function taking (name, value) for a MetricsSink, a function or None.
+    """
+    if metrics is None:
+        return None
+    return metrics.record if hasattr(metrics, "record") else metrics
+
+class Histogram:
+    """
+    Distribution of the values of a metric in buckets that grow exponentially, so percentiles are within a few percent of the exact value at any scale while memory stays constant.
+
+    Parameters
+    ----------
+    growth: float
+        ratio of the upper and lower bound of a bucket
+    """
+    def __init__(self, growth=1.05):
+        self.log_growth = math.log(growth)
+        self.growth = growth
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        # values that are not positive share one bucket below all others
+        bucket = math.floor(math.log(value) / self.log_growth) if value > 0 else -math.inf
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        """
+        Returns the value below which q percent of the values are, or None if there are no values.
+        """
+        if self.count == 0:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                if bucket == -math.inf:
+                    return self.min
+                # upper bound of the bucket, never outside the values seen
+                return min(max(self.growth ** (bucket + 1), self.min), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+class HistogramSink(MetricsSink):
+    """
+    MetricsSink that keeps a Histogram per metric in memory.
+
+    Parameters
+    ----------
+    growth: float
+        ratio of the upper and lower bound of a histogram bucket
+
+    Attributes
+    ----------
+    histograms: dict
+        metric name to Histogram
+    """
+    def __init__(self, growth=1.05):
+        self.growth = growth
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, value):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.growth)
+            histogram.add(value)
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """
+        Returns a dict of metric name to a dict with count, mean, min, max and the given percentiles such as p50.
+        """
+        with self._lock:
+            summary = {}
+            for name, histogram in sorted(self.histograms.items()):
+                stats = {"count": histogram.count, "mean": histogram.mean(), "min": histogram.min, "max": histogram.max}
+                for q in percentiles:
+                    stats[f"p{q}"] = histogram.percentile(q)
+                summary[name] = stats
+            return summary
+
+    def reset(self):
+        """
+        Removes all the recorded values.
+        """
+        with self._lock:
+            self.histograms = {}
@@ -0,0 +1,132 @@
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+class _JSONStream:
+    """
+    Pull parser over json text that arrives in chunks. Only as much text as is needed to decode the next value is kept in memory.
+    """
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = json.JSONDecoder()
+        self.utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, min_size):
+        # drop consumed text and read until at least min_size characters are unconsumed or the input ends
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        parts = [self.buf]
+        size = len(self.buf)
+        while size < min_size and not self.eof:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.eof = True
+                chunk = self.utf8_decoder.decode(b"", final=True)
+            elif isinstance(chunk, bytes):
+                chunk = self.utf8_decoder.decode(chunk)
+            parts.append(chunk)
+            size += len(chunk)
+        self.buf = "".join(parts)
+
+    def _skip_whitespace(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return
+            self._fill(1)
+
+    def next_char(self):
+        """
+        Consumes and returns the next character that is not whitespace.
+        """
+        self._skip_whitespace()
+        if self.pos >= len(self.buf):
+            raise json.JSONDecodeError("Unexpected end of data", self.buf, self.pos)
+        char = self.buf[self.pos]
+        self.pos += 1
+        return char
+
+    def expect(self, expected):
+        char = self.next_char()
+        if char not in expected:
+            raise json.JSONDecodeError(f"Expected one of {expected!r}", self.buf, self.pos - 1)
+        return char
+
+    def peek_char(self):
+        self._skip_whitespace()
+        return self.buf[self.pos] if self.pos < len(self.buf) else None
+
+    def read_value(self):
+        """
+        Decodes and returns the next json value.
+        """
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                complete = True
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and not self.eof:
+                    # a number at the end of the buffer may continue in the next chunk
+                    complete = end < len(self.buf) and self.buf[end] not in "0123456789.eE+-"
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                complete = False
+            if complete:
+                self.pos = end
+                return value
+            # at least double the unconsumed text before trying again, so a large value is decoded in linear time
+            self._fill(2 * (len(self.buf) - self.pos) + 1)
+
+    def drain(self):
+        for _ in self.chunks:
+            pass
+
+def iter_json_array(chunks, path):
+    """
+    Iterates over the elements of a json array nested in objects without decoding the whole document.
+    Elements are decoded one at a time as the chunks arrive, and the rest of the input is read but not decoded once the array ends.
+
+    Parameters
+    ----------
+    chunks: iterable
+        json text as chunks of utf-8 bytes or str, e.g. urllib3 HTTPResponse.stream()
+    path: list of str
+        keys of the objects leading to the array e.g. ['return_dict', 'result', 'blocks']
+
+    Raises
+    ------
+    KeyError
+        if a key of the path is missing
+    json.JSONDecodeError
+        if the input is not valid json
+    """
+    stream = _JSONStream(chunks)
+    for key in path:
+        stream.expect("{")
+        while True:
+            if stream.peek_char() == "}":
+                raise KeyError(key)
+            name = stream.read_value()
+            if not isinstance(name, str):
+                raise json.JSONDecodeError("Expected an object key", stream.buf, stream.pos)
+            stream.expect(":")
+            if name == key:
+                break
+            stream.read_value()
+            if stream.expect(",}") == "}":
+                raise KeyError(key)
+    stream.expect("[")
+    if stream.peek_char() == "]":
+        stream.pos += 1
+    else:
+        while True:
+            yield stream.read_value()
+            if stream.expect(",]") == "]":
+                break
+    stream.drain()
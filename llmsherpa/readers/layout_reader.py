@@ -1,3 +1,15 @@
+import io
+import sys
+import time
+from llmsherpa.readers.instrumentation import metrics_recorder
+from llmsherpa.readers.document_columns import DocumentColumns
+from llmsherpa.readers.spatial_index import SpatialIndex
+from llmsherpa.readers.text_index import TextIndex
+
+# names exported by from llmsherpa.readers.layout_reader import *, so the modules this one imports are not exported with it
+__all__ = ['Block', 'Paragraph', 'Section', 'ListItem', 'TableCell', 'TableRow', 'TableHeader', 'Table', 'LayoutReader', 'IncrementalLayoutReader',
+           'PackedChunk', 'ChunkPacker', 'DocumentIndex', 'Document']
+
 class Block:
     """
     A block is a node in the layout tree. It can be a paragraph, a list item, a table, or a section header. 
@@ -26,8 +38,10 @@ class Block:
     parent: Block
         parent of the block
     block_json: dict
-        json returned by the parser API for the block
+        json returned by the parser API for the block. It is None after compact is called.
     """
+    # __dict__ keeps attributes that applications set on blocks, such as block.embedding, working as they did before __slots__
+    __slots__ = ('tag', 'level', 'page_idx', 'block_idx', 'top', 'left', 'bbox', 'sentences', 'children', 'parent', 'block_json', '_context', '__dict__')
     tag: str
     def __init__(self, block_json=None):
         self.tag = block_json['tag'] if block_json and 'tag' in block_json else None
@@ -41,6 +55,7 @@ class Block:
         self.children = []
         self.parent = None
         self.block_json = block_json
+        self._context = None
 
     def add_child(self, node):
         """
@@ -49,18 +64,50 @@ class Block:
         self.children.append(node)
         node.parent = self
 
+    def compact(self):
+        """
+        Reduces the memory used by the block. Releases block_json, stores bbox and sentences as tuples and interns the tag. Children are not compacted.
+        """
+        self.block_json = None
+        if self.tag is not None:
+            self.tag = sys.intern(self.tag)
+        self.bbox = tuple(self.bbox)
+        self.sentences = tuple(self.sentences)
+
     def to_html(self, include_children=False, recurse=False):
         """
-        Converts the block to html. This is a virtual method and should be implemented by the derived classes.
+        Converts the block to html. The html is built by write_html.
         """
-        pass
+        out = io.StringIO()
+        self.write_html(out, include_children=include_children, recurse=recurse)
+        return out.getvalue()
 
     def to_text(self, include_children=False, recurse=False):
         """
-        Converts the block to text. This is a virtual method and should be implemented by the derived classes.
+        Converts the block to text. The text is built by write_text.
+        """
+        out = io.StringIO()
+        self.write_text(out, include_children=include_children, recurse=recurse)
+        return out.getvalue()
+
+    def write_html(self, out, include_children=False, recurse=False):
+        """
+        Writes the html of the block to out, a file like object with a write method. This is a virtual method and should be implemented by the derived classes.
+        """
+        pass
+
+    def write_text(self, out, include_children=False, recurse=False):
+        """
+        Writes the text of the block to out, a file like object with a write method. This is a virtual method and should be implemented by the derived classes.
         """
         pass
 
+    def sections_path(self):
+        """
+        Returns the sections the block is in, outermost first.
+        """
+        return [parent for parent in self.parent_chain() if parent.tag == 'header']
+
     def parent_chain(self):
         """
         Returns the parent chain of the block consisting of all the parents of the block until the root.
@@ -73,22 +120,35 @@ class Block:
         chain.reverse()
         return chain
 
+    def _context_text(self):
+        """
+        Returns the text the block adds to the context of its descendants, its own text for sections, paragraphs and list items and "" otherwise.
+        It is computed once per block and cached, so the blocks of a section share the rendering of their parents.
+        """
+        if self._context is None:
+            self._context = self.to_text() if self.tag in ['header', 'list_item', 'para'] else ""
+        return self._context
+
     def parent_text(self):
         """
         Returns the text of the parent chain of the block. This is useful for adding section information to the text.
+        The text of every parent is cached on the parent, it does not change if the sentences of a parent are modified later.
         """
-        parent_chain = self.parent_chain()
         header_texts = []
         para_texts = []
-        for p in parent_chain:
-            if p.tag == "header":
-                header_texts.append(p.to_text()) 
-            elif p.tag in ['list_item', 'para']:
-                para_texts.append(p.to_text())
+        parent = self.parent
+        while parent is not None:
+            if parent.tag == "header":
+                header_texts.append(parent._context_text())
+            elif parent.tag in ['list_item', 'para']:
+                para_texts.append(parent._context_text())
+            parent = parent.parent
+        header_texts.reverse()
+        para_texts.reverse()
         text = " > ".join(header_texts)
         if len(para_texts) > 0:
             text +="\n".join(para_texts)
-        return text                
+        return text
 
     def to_context_text(self, include_section_info=True):
         """
@@ -103,103 +163,124 @@ class Block:
             text += self.to_text()
         return text
     
+    def iter_preorder(self, tags=None, descend=None):
+        """
+        Iterates over all the descendants of the block in document order, a parent before its children. The tree is walked with an explicit stack so deep trees do not hit the recursion limit.
+
+        Parameters
+        ----------
+        tags: collection of str
+            If given, then only blocks with these tags are returned. Blocks with other tags are still descended into.
+        descend: function
+            called with a block and returns True if the children of the block should be visited. By default all blocks are descended into.
+        """
+        stack = self.children[::-1]
+        pop = stack.pop
+        push = stack.append
+        extend = stack.extend
+        while stack:
+            node = pop()
+            if tags is None or node.tag in tags:
+                yield node
+            children = node.children
+            if children and (descend is None or descend(node)):
+                # most blocks with children have only one, such as nested list items, and are pushed without copying the list
+                if len(children) == 1:
+                    push(children[0])
+                else:
+                    extend(children[::-1])
+
+    def iter_postorder(self, tags=None, descend=None):
+        """
+        Iterates over all the descendants of the block with children before their parent. Takes the same parameters as iter_preorder.
+        """
+        stack = [(child, False) for child in reversed(self.children)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded or not node.children or (descend is not None and not descend(node)):
+                if tags is None or node.tag in tags:
+                    yield node
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+
     def iter_children(self, node, level, node_visitor):
         """
-        Iterates over all the children of the node and calls the node_visitor function on each child.
+        Iterates over all the children of the node and calls the node_visitor function on each child. Chunks are visited but not descended into.
         """
-        for child in node.children:
+        for child in node.iter_preorder(descend=_is_not_chunk):
             node_visitor(child)
-            # print("-"*level, child.tag, f"({len(child.children)})", child.to_text())
-            if child.tag not in ['list_item', 'para', 'table']:
-                self.iter_children(child, level + 1, node_visitor)
 
     def paragraphs(self):
         """
         Returns all the paragraphs in the block. This is useful for getting all the paragraphs in a section.
         """
-        paragraphs = []
-        def para_collector(node):
-            if node.tag == 'para':
-                paragraphs.append(node)
-        self.iter_children(self, 0, para_collector)
-        return paragraphs
+        return list(self.iter_preorder(tags=['para'], descend=_is_not_chunk))
        
     def chunks(self):
         """
         Returns all the chunks in the block. Chunking automatically splits the document into paragraphs, lists, and tables without any prior knowledge of the document structure.
         """
-        chunks = []
-        def chunk_collector(node):
-            if node.tag in ['para', 'list_item', 'table']:
-                chunks.append(node)
-        self.iter_children(self, 0, chunk_collector)
-        return chunks
+        return list(self.iter_preorder(tags=['para', 'list_item', 'table'], descend=_is_not_chunk))
     
     def tables(self):
         """
         Returns all the tables in the block. This is useful for getting all the tables in a section.
         """
-        tables = []
-        def chunk_collector(node):
-            if node.tag in ['table']:
-                tables.append(node)
-        self.iter_children(self, 0, chunk_collector)        
-        return tables
+        return list(self.iter_preorder(tags=['table'], descend=_is_not_chunk))
 
     def sections(self):
         """
         Returns all the sections in the block. This is useful for getting all the sections in a document.
         """
-        sections = []
-        def chunk_collector(node):
-            if node.tag in ['header']:
-                sections.append(node)
-        self.iter_children(self, 0, chunk_collector)
-        return sections
+        return list(self.iter_preorder(tags=['header'], descend=_is_not_chunk))
+
+def _is_not_chunk(block):
+    # chunks are paragraphs, lists and tables along with everything nested in them
+    return block.tag not in ['para', 'list_item', 'table']
 
 class Paragraph(Block):
     """
     A paragraph is a block of text. It can have children such as lists. A paragraph has tag 'para'.
     """
+    __slots__ = ()
+    _html_end = "</p>"
+    _html_children_tags = ("<ul>", "</ul>")
     def __init__(self, para_json):
         super().__init__(para_json)
-    def to_text(self, include_children=False, recurse=False):
+    def write_text(self, out, include_children=False, recurse=False):
         """
-        Converts the paragraph to text. If include_children is True, then the text of the children is also included. If recurse is True, then the text of the children's children are also included.
+        Writes the paragraph as text to out. If include_children is True, then the text of the children is also included. If recurse is True, then the text of the children's children are also included.
         
         Parameters
         ----------
+        out: file like object
+            object with a write method such as io.StringIO or an open text file
         include_children: bool
             If True, then the text of the children are also included
         recurse: bool
             If True, then the text of the children's children are also included
         """
-        para_text = "\n".join(self.sentences)
-        if include_children:
-            for child in self.children:
-                para_text += "\n" + child.to_text(include_children=recurse, recurse=recurse)
-        return para_text    
-    def to_html(self, include_children=False, recurse=False):
+        _write_tree_text(self, out, include_children, recurse)
+    def write_html(self, out, include_children=False, recurse=False):
         """
-        Converts the paragraph to html. If include_children is True, then the html of the children is also included. If recurse is True, then the html of the children's children are also included.
+        Writes the paragraph as html to out. If include_children is True, then the html of the children is also included. If recurse is True, then the html of the children's children are also included.
 
         Parameters
         ----------
+        out: file like object
+            object with a write method such as io.StringIO or an open text file
         include_children: bool
             If True, then the html of the children are also included
         recurse: bool
             If True, then the html of the children's children are also included
         """
-        html_str = "<p>"
-        html_str = html_str + "\n".join(self.sentences)
-        if include_children:
-            if len(self.children) > 0:
-                html_str += "<ul>"
-                for child in self.children:
-                    html_str = html_str + child.to_html(include_children=recurse, recurse=recurse)
-                html_str += "</ul>"
-        html_str = html_str + "</p>"
-        return html_str
+        _write_tree_html(self, out, include_children, recurse)
+    def _write_own_text(self, out):
+        out.write("\n".join(self.sentences))
+    def _write_html_start(self, out):
+        out.write("<p>")
+        out.write("\n".join(self.sentences))
     
 class Section(Block):
     """
@@ -210,97 +291,155 @@ class Section(Block):
     title: str
         title of the section
     """
+    __slots__ = ('title',)
+    _html_end = ""
+    _html_children_tags = ("", "")
     def __init__(self, section_json):
         super().__init__(section_json)
         self.title = "\n".join(self.sentences)
-    def to_text(self, include_children=False, recurse=False):
+    def write_text(self, out, include_children=False, recurse=False):
         """
-        Converts the section to text. If include_children is True, then the text of the children is also included. If recurse is True, then the text of the children's children are also included.
+        Writes the section as text to out. If include_children is True, then the text of the children is also included. If recurse is True, then the text of the children's children are also included.
 
         Parameters
         ----------
+        out: file like object
+            object with a write method such as io.StringIO or an open text file
         include_children: bool
             If True, then the text of the children are also included
         recurse: bool
             If True, then the text of the children's children are also included
         """
-        text = self.title
-        if include_children:
-            for child in self.children:
-                text += "\n" + child.to_text(include_children=recurse, recurse=recurse)
-        return text    
+        _write_tree_text(self, out, include_children, recurse)
 
-    def to_html(self, include_children=False, recurse=False):
+    def write_html(self, out, include_children=False, recurse=False):
         """
-        Converts the section to html. If include_children is True, then the html of the children is also included. If recurse is True, then the html of the children's children are also included.
+        Writes the section as html to out. If include_children is True, then the html of the children is also included. If recurse is True, then the html of the children's children are also included.
 
         Parameters
         ----------
+        out: file like object
+            object with a write method such as io.StringIO or an open text file
         include_children: bool
             If True, then the html of the children are also included
         recurse: bool
             If True, then the html of the children's children are also included
         """
-        html_str = f"<h{self.level + 1}>"
-        html_str = html_str + self.title
-        html_str = html_str + f"</h{self.level + 1}>"
-        if include_children:
-            for child in self.children:
-                html_str += child.to_html(include_children=recurse, recurse=recurse)
-        return html_str
+        _write_tree_html(self, out, include_children, recurse)
+
+    def _write_own_text(self, out):
+        out.write(self.title)
+
+    def _write_html_start(self, out):
+        out.write(f"<h{self.level + 1}>")
+        out.write(self.title)
+        out.write(f"</h{self.level + 1}>")
 
 class ListItem(Block):
     """
     A list item is a block of text. It can have child list items. A list item has tag 'list_item'.
     """
+    __slots__ = ()
+    _html_end = "</li>"
+    _html_children_tags = ("<ul>", "</ul>")
     def __init__(self, list_json):
         super().__init__(list_json)
 
-    def to_text(self, include_children=False, recurse=False):
+    def write_text(self, out, include_children=False, recurse=False):
         """
-        Converts the list item to text. If include_children is True, then the text of the children is also included. If recurse is True, then the text of the children's children are also included.
+        Writes the list item as text to out. If include_children is True, then the text of the children is also included. If recurse is True, then the text of the children's children are also included.
         
         Parameters
         ----------
+        out: file like object
+            object with a write method such as io.StringIO or an open text file
         include_children: bool
             If True, then the text of the children are also included
         recurse: bool
             If True, then the text of the children's children are also included
         """
-        text = "\n".join(self.sentences)
-        if include_children:
-            for child in self.children:
-                text += "\n" + child.to_text(include_children=recurse, recurse=recurse)
-        return text    
+        _write_tree_text(self, out, include_children, recurse)
 
-    def to_html(self, include_children=False, recurse=False):
+    def write_html(self, out, include_children=False, recurse=False):
         """
-        Converts the list item to html. If include_children is True, then the html of the children is also included. If recurse is True, then the html of the children's children are also included.
+        Writes the list item as html to out. If include_children is True, then the html of the children is also included. If recurse is True, then the html of the children's children are also included.
         
         Parameters
         ----------
+        out: file like object
+            object with a write method such as io.StringIO or an open text file
         include_children: bool
             If True, then the html of the children are also included
         recurse: bool
             If True, then the html of the children's children are also included
         """
-        html_str = f"<li>"
-        html_str = html_str + "\n".join(self.sentences)
-        if include_children:
-            if len(self.children) > 0:
-                html_str += "<ul>"
-                for child in self.children:
-                    html_str = html_str + child.to_html(include_children=recurse, recurse=recurse)
-                html_str += "</ul>"        
-        html_str = html_str + f"</li>"
-        return html_str
+        _write_tree_html(self, out, include_children, recurse)
+
+    def _write_own_text(self, out):
+        out.write("\n".join(self.sentences))
+
+    def _write_html_start(self, out):
+        out.write("<li>")
+        out.write("\n".join(self.sentences))
+
+
+# blocks whose children are written by _write_tree_text and _write_tree_html
+_TREE_BLOCKS = (Paragraph, Section, ListItem)
+
+def _write_tree_text(node, out, include_children, recurse):
+    """
+    Writes the text of a paragraph, section or list item and its children to out, with an explicit stack so deeply nested lists do not hit the recursion limit.
+    Children of other kinds such as tables are written with their own write_text.
+    """
+    node._write_own_text(out)
+    if not include_children:
+        return
+    write = out.write
+    stack = node.children[::-1]
+    while stack:
+        node = stack.pop()
+        write("\n")
+        if not isinstance(node, _TREE_BLOCKS):
+            node.write_text(out, include_children=recurse, recurse=recurse)
+            continue
+        node._write_own_text(out)
+        if recurse and node.children:
+            stack.extend(node.children[::-1])
+
+def _write_tree_html(node, out, include_children, recurse):
+    """
+    Writes the html of a paragraph, section or list item and its children to out, like _write_tree_text. The closing tags wait on the stack until the children are written.
+    """
+    write = out.write
+    stack = [node]
+    with_children = include_children
+    while stack:
+        node = stack.pop()
+        if node.__class__ is str:
+            write(node)
+            continue
+        if not isinstance(node, _TREE_BLOCKS):
+            node.write_html(out, include_children=with_children, recurse=recurse)
+        else:
+            node._write_html_start(out)
+            children = node.children
+            if with_children and children:
+                open_tag, close_tag = node._html_children_tags
+                write(open_tag)
+                stack.append(node._html_end)
+                stack.append(close_tag)
+                stack.extend(children[::-1])
+            else:
+                write(node._html_end)
+        # only the block the html was asked for can differ from recurse
+        with_children = recurse
 
-    
 class TableCell(Block):
     """
     A table cell is a block of text. It can have child paragraphs. A table cell has tag 'table_cell'.
     A table cell is contained within table rows.
     """
+    __slots__ = ('col_span', 'cell_value', 'cell_node')
     def __init__(self, cell_json):
         super().__init__(cell_json)
         self.col_span = cell_json['col_span'] if 'col_span' in cell_json else 1
@@ -309,31 +448,41 @@ class TableCell(Block):
             self.cell_node = Paragraph(self.cell_value)
         else:
             self.cell_node = None
-    def to_text(self):
+    def compact(self):
         """
-        Returns the cell value of the text. If the cell value is a paragraph node, then the text of the node is returned.
+        Reduces the memory used by the cell and its paragraph node. The cell_value of a paragraph node is released along with block_json.
         """
-        cell_text = self.cell_value
+        super().compact()
         if self.cell_node:
-            cell_text = self.cell_node.to_text()
-        return cell_text
-    def to_html(self):
+            self.cell_node.compact()
+            self.cell_value = None
+    def write_text(self, out, include_children=False, recurse=False):
         """
-        Returns the cell value ashtml. If the cell value is a paragraph node, then the html of the node is returned.
+        Writes the cell value as text to out. If the cell value is a paragraph node, then the text of the node is written.
         """
-        cell_html = self.cell_value
         if self.cell_node:
-            cell_html = self.cell_node.to_html()
+            self.cell_node.write_text(out)
+        else:
+            out.write(self.cell_value)
+    def write_html(self, out, include_children=False, recurse=False):
+        """
+        Writes the cell value as html to out. If the cell value is a paragraph node, then the html of the node is written.
+        """
         if self.col_span == 1:
-            html_str = f"<td colSpan={self.col_span}>{cell_html}</td>"
+            out.write(f"<td colSpan={self.col_span}>")
+        else:
+            out.write("<td>")
+        if self.cell_node:
+            self.cell_node.write_html(out)
         else:
-            html_str = f"<td>{cell_html}</td>"
-        return html_str
+            out.write(f"{self.cell_value}")
+        out.write("</td>")
             
 class TableRow(Block):
     """
     A table row is a block of text. It can have child table cells.
     """
+    __slots__ = ('cells',)
     def __init__(self, row_json):
         self.cells = []
         if row_json['type'] == 'full_row':
@@ -343,185 +492,641 @@ class TableRow(Block):
             for cell_json in row_json['cells']:
                 cell = TableCell(cell_json)
                 self.cells.append(cell)
-    def to_text(self, include_children=False, recurse=False):
+    def compact(self):
         """
-        Returns text of a row with text from all the cells in the row delimited by '|'
+        Reduces the memory used by the cells of the row.
         """
-        cell_text = ""
         for cell in self.cells:
-            cell_text = cell_text + " | " + cell.to_text()
-        return cell_text
-    def to_html(self, include_children=False, recurse=False):
+            cell.compact()
+    def write_text(self, out, include_children=False, recurse=False):
+        """
+        Writes text of a row with text from all the cells in the row delimited by '|'
+        """
+        for cell in self.cells:
+            out.write(" | ")
+            cell.write_text(out)
+    def write_html(self, out, include_children=False, recurse=False):
         """
-        Returns html for a <tr> with html from all the cells in the row as <td>
+        Writes html for a <tr> with html from all the cells in the row as <td>
         """
-        html_str = "<tr>"
+        out.write("<tr>")
         for cell in self.cells:
-            html_str = html_str + cell.to_html()
-        html_str = html_str + "</tr>"
-        return html_str
+            cell.write_html(out)
+        out.write("</tr>")
 
 class TableHeader(Block):
     """
     A table header is a block of text. It can have child table cells.
     """
+    __slots__ = ('cells',)
     def __init__(self, row_json):
         super().__init__(row_json)
         self.cells = []
         for cell_json in row_json['cells']:
             cell = TableCell(cell_json)
             self.cells.append(cell)
-    def to_text(self, include_children=False, recurse=False):
+    def compact(self):
+        """
+        Reduces the memory used by the header and its cells.
+        """
+        super().compact()
+        for cell in self.cells:
+            cell.compact()
+    def write_text(self, out, include_children=False, recurse=False):
         """
-        Returns text of a row with text from all the cells in the row delimited by '|' and the header row is delimited by '---'
-        Text is returned in markdown format.
+        Writes text of a row with text from all the cells in the row delimited by '|' and the header row is delimited by '---'
+        Text is written in markdown format.
         """
-        cell_text = ""
         for cell in self.cells:
-            cell_text = cell_text + " | " + cell.to_text()
-        cell_text += "\n"
+            out.write(" | ")
+            cell.write_text(out)
+        out.write("\n")
         for cell in self.cells:
-            cell_text = cell_text + " | " + "---"           
-        return cell_text
-    def to_html(self, include_children=False, recurse=False):
+            out.write(" | ---")
+    def write_html(self, out, include_children=False, recurse=False):
         """
-        Returns html for a <th> with html from all the cells in the row as <td>
+        Writes html for a <th> with html from all the cells in the row as <td>
         """
-        html_str = "<th>"
+        out.write("<th>")
         for cell in self.cells:
-            html_str = html_str + cell.to_html()
-        html_str = html_str + "</th>"
-        return html_str
+            cell.write_html(out)
+        out.write("</th>")
         
 class Table(Block):
     """
     A table is a block of text. It can have child table rows. A table has tag 'table'.
+    The row and cell objects are built from the json of the table rows when rows or headers is first accessed, so documents where tables are not read do not pay for them.
     """
+    __slots__ = ('_rows', '_headers', '_table_rows', 'name')
     def __init__(self, table_json, parent):
         # self.title = parent.name
         super().__init__(table_json)
-        self.rows = []
-        self.headers = []
+        self._rows = None
+        self._headers = None
+        self._table_rows = table_json['table_rows'] if 'table_rows' in table_json else []
         self.name = table_json["name"]
-        if 'table_rows' in table_json:
-            for row_json in table_json['table_rows']:
-                if row_json['type'] == 'table_header':
-                    row = TableHeader(row_json)
-                    self.headers.append(row)
-                else:
-                    row = TableRow(row_json)
-                    self.rows.append(row)
-    def to_text(self, include_children=False, recurse=False):
+
+    def _build_rows(self):
+        rows = []
+        headers = []
+        for row_json in self._table_rows:
+            if row_json['type'] == 'table_header':
+                headers.append(TableHeader(row_json))
+            else:
+                rows.append(TableRow(row_json))
+        # a table without block_json was compacted, rows built after that are compacted as well
+        if self.block_json is None:
+            for row in headers + rows:
+                row.compact()
+        self._rows = rows
+        self._headers = headers
+        self._table_rows = None
+
+    def _row_texts(self):
+        """
+        Returns the text of the headers followed by the text of the rows, the same as to_text of every header and row. Rows that were not built yet are rendered from their json without building them.
+        """
+        if self._rows is not None:
+            return [row.to_text() for row in self._headers + self._rows]
+        headers = []
+        rows = []
+        for row_json in self._table_rows:
+            if row_json['type'] == 'full_row':
+                rows.append(" | " + _cell_text(row_json))
+                continue
+            text = "".join(" | " + _cell_text(cell_json) for cell_json in row_json['cells'])
+            if row_json['type'] == 'table_header':
+                headers.append(text + "\n" + " | ---" * len(row_json['cells']))
+            else:
+                rows.append(text)
+        return headers + rows
+
+    @property
+    def rows(self):
         """
-        Returns text of a table with text from all the rows in the table delimited by '\n'
+        list of TableRow of the table
+        """
+        if self._rows is None:
+            self._build_rows()
+        return self._rows
+
+    @rows.setter
+    def rows(self, rows):
+        if self._rows is None:
+            self._build_rows()
+        self._rows = rows
+
+    @property
+    def headers(self):
+        """
+        list of TableHeader of the table
+        """
+        if self._headers is None:
+            self._build_rows()
+        return self._headers
+
+    @headers.setter
+    def headers(self, headers):
+        if self._headers is None:
+            self._build_rows()
+        self._headers = headers
+
+    def compact(self):
+        """
+        Reduces the memory used by the table and its rows. Rows that were not built yet keep their json and are compacted when they are built.
+        """
+        super().compact()
+        if self._rows is not None:
+            for row in self._headers + self._rows:
+                row.compact()
+    def write_text(self, out, include_children=False, recurse=False):
+        """
+        Writes text of a table with text from all the rows in the table delimited by '\n'
         """
-        text = ""
         for header in self.headers:
-            text = text + header.to_text() + "\n"
+            header.write_text(out)
+            out.write("\n")
         for row in self.rows:
-            text = text + row.to_text() + "\n"
-        return text
+            row.write_text(out)
+            out.write("\n")
                    
-    def to_html(self, include_children=False, recurse=False):
+    def write_html(self, out, include_children=False, recurse=False):
         """
-        Returns html for a <table> with html from all the rows in the table as <tr>
+        Writes html for a <table> with html from all the rows in the table as <tr>
         """
-        html_str = "<table>"
+        out.write("<table>")
         for header in self.headers:
-            html_str = html_str + header.to_html()
+            header.write_html(out)
         for row in self.rows:
-            html_str = html_str + row.to_html()
-        html_str = html_str + "</table>"
-        return html_str
+            row.write_html(out)
+        out.write("</table>")
+
+def _cell_text(cell_json):
+    # text of a TableCell built from cell_json, a cell value that is not a string is a paragraph
+    cell_value = cell_json['cell_value']
+    if isinstance(cell_value, str):
+        return cell_value
+    return "\n".join(cell_value['sentences'] if 'sentences' in cell_value else [])
 
 class LayoutReader:
     """
     Reads the layout tree from the json returned by the parser API.
     """
     def debug(self, pdf_root):
-        def iter_children(node, level):
-            for child in node.children:
-                print("-"*level, child.tag, f"({len(child.children)})", child.to_text())
-                iter_children(child, level + 1)
-        iter_children(pdf_root, 0)
+        stack = [(child, 0) for child in reversed(pdf_root.children)]
+        while stack:
+            node, level = stack.pop()
+            print("-"*level, node.tag, f"({len(node.children)})", node.to_text())
+            stack.extend((child, level + 1) for child in reversed(node.children))
 
-    def read(self, blocks_json):
+    def read(self, blocks_json, compact=False, text_index=None):
         """
         Reads the layout tree from the json returned by the parser API. Constructs a tree of Block objects.
+        If compact is True, then every block is compacted as soon as it is built so the json of a block can be freed while the rest is still being read.
+        If text_index is given, then the sentences of every block are added to the TextIndex as the block is built.
         """
-        root = Block()
-        parent = None
-        parent_stack = [root]
-        prev_node = root
-        parent = root
-        list_stack = []
+        reader = IncrementalLayoutReader(compact=compact, text_index=text_index)
         for block in blocks_json:
-            if block['tag'] != 'list_item' and len(list_stack) > 0:
-                list_stack = []
-            if block['tag'] == 'para':
-                node = Paragraph(block)
+            reader.add_block(block)
+        return reader.root
+
+    def iter_chunks(self, blocks_json, compact=False):
+        """
+        Reads the layout tree like read, but yields every chunk as soon as it is complete, i.e. no later block can be added to it or its children.
+        blocks_json can be an iterator such as the blocks decoded from a parser response, chunks are then available while later blocks are still being decoded.
+        Yields (chunk, sections) tuples where sections is the list of sections the chunk is in, outermost first.
+        """
+        reader = IncrementalLayoutReader(compact=compact)
+        for block in blocks_json:
+            chunk = reader.add_block(block)
+            if chunk is not None:
+                yield chunk, chunk.sections_path()
+        chunk = reader.close()
+        if chunk is not None:
+            yield chunk, chunk.sections_path()
+
+class IncrementalLayoutReader:
+    """
+    Builds the layout tree from the json returned by the parser API one block at a time. LayoutReader.read and LayoutReader.iter_chunks are built on it.
+
+    Parameters
+    ----------
+    compact: bool
+        If True, then every block is compacted as soon as it is built
+    text_index: TextIndex
+        If given, then every block is added to it as soon as it is built
+
+    Attributes
+    ----------
+    root: Block
+        root of the layout tree built so far
+    """
+    def __init__(self, compact=False, text_index=None):
+        self.compact = compact
+        self.text_index = text_index
+        self.root = Block()
+        self.parent_stack = [self.root]
+        self.prev_node = self.root
+        self.parent = self.root
+        self.list_stack = []
+        # the chunk under a section that list items can still be added to
+        self.open_chunk = None
+
+    def add_block(self, block):
+        """
+        Adds the next block to the tree. Returns the chunk that was completed by adding the block or None.
+        Chunks are paragraphs, list items and tables as returned by Block.chunks. A chunk is complete when a block is added outside of it, as lists only ever attach to the latest chunk.
+        """
+        if block['tag'] != 'list_item' and len(self.list_stack) > 0:
+            self.list_stack = []
+        parent = self.parent
+        prev_node = self.prev_node
+        list_stack = self.list_stack
+        if block['tag'] == 'para':
+            node = Paragraph(block)
+            parent.add_child(node)
+        elif block['tag'] == 'table':
+            node = Table(block, prev_node)
+            parent.add_child(node)
+        elif block['tag'] == 'list_item':
+            node = ListItem(block)
+            # add lists as children to previous paragraph 
+            # this handles examples like - The following items need to be addressed: 1) item 1 2) item 2 etc.
+            if prev_node.tag == 'para' and prev_node.level == node.level:
+                list_stack.append(prev_node)
+            # sometimes there are lists within lists in legal documents
+            elif prev_node.tag == 'list_item':
+                if node.level > prev_node.level:
+                    list_stack.append(prev_node)
+                elif node.level < prev_node.level:
+                    while len(list_stack) > 0 and list_stack.pop().level > node.level:
+                        pass
+                    # list_stack.append(node)
+            if len(list_stack) > 0:
+                list_stack[-1].add_child(node)
+            else:
                 parent.add_child(node)
-            elif block['tag'] == 'table':
-                node = Table(block, prev_node)
+                
+        elif block['tag'] == 'header':
+            node = Section(block)
+            parent_stack = self.parent_stack
+            if node.level > parent.level:
+                parent_stack.append(node)
                 parent.add_child(node)
-            elif block['tag'] == 'list_item':
-                node = ListItem(block)
-                # add lists as children to previous paragraph 
-                # this handles examples like - The following items need to be addressed: 1) item 1 2) item 2 etc.
-                if prev_node.tag == 'para' and prev_node.level == node.level:
-                    list_stack.append(prev_node)
-                # sometimes there are lists within lists in legal documents
-                elif prev_node.tag == 'list_item':
-                    if node.level > prev_node.level:
-                        list_stack.append(prev_node)
-                    elif node.level < prev_node.level:
-                        while len(list_stack) > 0 and list_stack.pop().level > node.level:
-                            pass
-                        # list_stack.append(node)
-                if len(list_stack) > 0:
-                    list_stack[-1].add_child(node)
-                else:
-                    parent.add_child(node)
-                    
-            elif block['tag'] == 'header':
-                node = Section(block)
-                if node.level > parent.level:
-                    parent_stack.append(node)
-                    parent.add_child(node)
-                else:
-                    while len(parent_stack) > 1 and parent_stack[-1].level >= node.level:
-                        parent_stack.pop()
-                    parent_stack[-1].add_child(node)            
-                    parent_stack.append(node)
-                parent = node
-            prev_node = node
+            else:
+                while len(parent_stack) > 1 and parent_stack[-1].level >= node.level:
+                    parent_stack.pop()
+                parent_stack[-1].add_child(node)            
+                parent_stack.append(node)
+            self.parent = node
+        else:
+            # blocks with other tags are not part of the tree
+            return None
+        if self.compact:
+            node.compact()
+        if self.text_index is not None:
+            self.text_index.add_block(node)
+        self.prev_node = node
+        completed = None
+        if node.parent.tag not in ['para', 'list_item']:
+            completed = self.open_chunk
+            self.open_chunk = node if node.tag in ['para', 'list_item', 'table'] else None
+        return completed
+
+    def close(self):
+        """
+        Ends the input. Returns the last chunk if it was not returned yet or None.
+        """
+        completed = self.open_chunk
+        self.open_chunk = None
+        return completed
+
+class _CollectingIterator:
+    """
+    Iterator that keeps the items it has returned in a list.
+    """
+    def __init__(self, iterable):
+        self.iterator = iter(iterable)
+        self.items = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self.iterator)
+        self.items.append(item)
+        return item
+
+class PackedChunk:
+    """
+    A chunk of text for embedding made by Document.pack_chunks from one or more sibling chunks of a section, or from some of the rows of a large table.
+
+    Attributes
+    ----------
+    blocks: list
+        the paragraphs, list items and tables the text is taken from, in document order
+    text: str
+        text of the blocks delimited by '\n'. Text of a table split by rows has the table headers followed by the rows in the chunk.
+    context: str
+        section information of the blocks as returned by Block.parent_text
+    size: int
+        size of the text as measured by the length function given to pack_chunks
+    """
+    def __init__(self, blocks, text, context, size):
+        self.blocks = blocks
+        self.text = text
+        self.context = context
+        self.size = size
 
-        return root
+    def to_context_text(self, include_section_info=True):
+        """
+        Returns the text of the chunk with section information, in the same format as Block.to_context_text
+        """
+        if include_section_info:
+            return self.context + "\n" + self.text
+        return self.text
+
+class ChunkPacker:
+    """
+    Packs the chunks of a layout tree into chunks of about the same size. Consecutive chunks that are children of the same section are merged as long as they fit in max_size, tables that do not fit are split by rows and every part repeats the table headers.
+    A chunk that does not fit and can not be split is kept as it is. Each chunk is rendered and measured once, so packing is linear in the size of the document.
+
+    Parameters
+    ----------
+    max_size: int
+        target maximum size of a packed chunk
+    length_function: function
+        returns the size of a text, e.g. the number of tokens for an embedding model. Defaults to the number of characters.
+    """
+    def __init__(self, max_size, length_function=len):
+        self.max_size = max_size
+        self.length_function = length_function
+        self.separator_size = length_function("\n")
+
+    def pack(self, root):
+        """
+        Returns a list of PackedChunk for all the chunks under root in document order.
+        """
+        packed = []
+        pending = []
+        pending_size = 0
+        for node in root.iter_preorder(descend=_is_not_chunk):
+            if node.tag not in ['para', 'list_item', 'table']:
+                # chunks before and after a subsection are not merged
+                self._flush(pending, packed)
+                pending = []
+                continue
+            if pending and node.parent is not pending[0][0].parent:
+                self._flush(pending, packed)
+                pending = []
+            text = node.to_text(include_children=True, recurse=True)
+            size = self.length_function(text)
+            if size > self.max_size and node.tag == 'table':
+                self._flush(pending, packed)
+                pending = []
+                self._split_table(node, packed)
+                continue
+            if pending and pending_size + self.separator_size + size > self.max_size:
+                self._flush(pending, packed)
+                pending = []
+            pending_size = pending_size + self.separator_size + size if pending else size
+            pending.append((node, text, size))
+        self._flush(pending, packed)
+        return packed
+
+    def _flush(self, pending, packed):
+        if not pending:
+            return
+        blocks = [node for node, _, _ in pending]
+        text = "\n".join(text for _, text, _ in pending)
+        size = sum(size for _, _, size in pending) + self.separator_size * (len(pending) - 1)
+        packed.append(PackedChunk(blocks, text, blocks[0].parent_text(), size))
+
+    def _split_table(self, table, packed):
+        context = table.parent_text()
+        header_text = "".join(header.to_text() + "\n" for header in table.headers)
+        header_size = self.length_function(header_text)
+        rows = []
+        size = header_size
+        for row in table.rows:
+            row_text = row.to_text() + "\n"
+            row_size = self.length_function(row_text)
+            if rows and size + row_size > self.max_size:
+                packed.append(PackedChunk([table], header_text + "".join(rows), context, size))
+                rows = []
+                size = header_size
+            rows.append(row_text)
+            size += row_size
+        if rows or not table.rows:
+            packed.append(PackedChunk([table], header_text + "".join(rows), context, size))
+
+class DocumentIndex:
+    """
+    Flat indexes over the layout tree of a document, built with a single walk of the tree.
+    Chunks, tables, sections and paragraphs follow the same rules as Block.chunks, Block.tables, Block.sections and Block.paragraphs, i.e. blocks nested inside a chunk are not chunks themselves.
+
+    Attributes
+    ----------
+    blocks: list
+        all blocks in the tree in document order including blocks nested in chunks
+    chunks: list
+        paragraphs, list items and tables that are chunks in document order
+    tables: list
+        tables in document order
+    sections: list
+        sections in document order
+    paragraphs: list
+        paragraphs in document order
+    blocks_by_idx: dict
+        block_idx to the first block in document order with that block_idx
+    chunks_by_page: dict
+        page_idx to the chunks on that page in document order
+    """
+    def __init__(self, root):
+        self.blocks = []
+        self.chunks = []
+        self.tables = []
+        self.sections = []
+        self.paragraphs = []
+        self.blocks_by_idx = {}
+        self.chunks_by_page = {}
+        # depth first walk in document order, the flag tells if the block is nested in a chunk
+        stack = [(child, False) for child in reversed(root.children)]
+        while stack:
+            node, in_chunk = stack.pop()
+            self.blocks.append(node)
+            if node.block_idx not in self.blocks_by_idx:
+                self.blocks_by_idx[node.block_idx] = node
+            is_chunk = node.tag in ['para', 'list_item', 'table']
+            if not in_chunk:
+                if is_chunk:
+                    self.chunks.append(node)
+                    self.chunks_by_page.setdefault(node.page_idx, []).append(node)
+                if node.tag == 'para':
+                    self.paragraphs.append(node)
+                elif node.tag == 'table':
+                    self.tables.append(node)
+                elif node.tag == 'header':
+                    self.sections.append(node)
+            child_in_chunk = in_chunk or is_chunk
+            for child in reversed(node.children):
+                stack.append((child, child_in_chunk))
 
 class Document:
     """
     A document is a tree of blocks. It is the root node of the layout tree.
+
+    Parameters
+    ----------
+    blocks_json: list
+        blocks returned by the parser API. It can also be an iterator that yields the blocks as they are decoded, the tree is then built as the blocks arrive.
+    keep_json: bool
+        If True, then the parser json is kept in json and in block_json of every block. If False, then it is released after the tree is built and every block is compacted, which roughly halves the memory used by a document.
+    text_index: bool
+        If True, then the text index of the document is built while the tree is read instead of on first access of text_index
+    metrics: MetricsSink or function
+        If given, then the time to build the document and its counts of blocks, sections, tables and chunks are recorded to it, see llmsherpa.readers.MetricsSink
     """
-    def __init__(self, blocks_json):
+    def __init__(self, blocks_json, keep_json=True, text_index=False, metrics=None):
+        start = time.perf_counter()
         self.reader = LayoutReader()
-        self.root_node = self.reader.read(blocks_json)
-        self.json = blocks_json
+        self._text_index = TextIndex(self) if text_index else None
+        if keep_json and not isinstance(blocks_json, list):
+            blocks_json = _CollectingIterator(blocks_json)
+            self.root_node = self.reader.read(blocks_json, text_index=self._text_index)
+            self.json = blocks_json.items
+        else:
+            self.root_node = self.reader.read(blocks_json, compact=not keep_json, text_index=self._text_index)
+            self.json = blocks_json if keep_json else None
+        self._index = None
+        self._columns = None
+        self._spatial_index = None
         self.top_sections = self._get_top_sections()
+        record = metrics_recorder(metrics)
+        if record is not None:
+            record("document.seconds", time.perf_counter() - start)
+            # counted with walks of the tree so recording does not build the index
+            tags = [block.tag for block in self.root_node.iter_preorder(tags=['para', 'list_item', 'table', 'header'], descend=_is_not_chunk)]
+            record("document.blocks", sum(1 for _ in self.root_node.iter_preorder()))
+            record("document.sections", tags.count('header'))
+            record("document.tables", tags.count('table'))
+            record("document.chunks", len(tags) - tags.count('header'))
+
+    @classmethod
+    def from_tree(cls, root_node):
+        """
+        Returns a document for a layout tree that was already built, e.g. loaded with load_document. json of the document is None.
+        """
+        document = cls.__new__(cls)
+        document.reader = LayoutReader()
+        document.root_node = root_node
+        document.json = None
+        document._index = None
+        document._text_index = None
+        document._columns = None
+        document._spatial_index = None
+        document.top_sections = document._get_top_sections()
+        return document
+
+    @property
+    def index(self):
+        """
+        DocumentIndex over the layout tree. It is built on first access and reused by chunks, tables, sections and the other lookups.
+        """
+        if self._index is None:
+            self._index = DocumentIndex(self.root_node)
+        return self._index
+
+    @property
+    def text_index(self):
+        """
+        TextIndex over the sentences of all the blocks of the document. It is built on first access unless the document was read with text_index True.
+        """
+        if self._text_index is None:
+            self._text_index = TextIndex(self)
+            for block in self.index.blocks:
+                self._text_index.add_block(block)
+        return self._text_index
+
+    @property
+    def columns(self):
+        """
+        DocumentColumns over all the blocks of the document. It is built on first access.
+        """
+        if self._columns is None:
+            self._columns = DocumentColumns(self.index.blocks)
+        return self._columns
+
+    @property
+    def spatial_index(self):
+        """
+        SpatialIndex over all the blocks of the document. It is built on first access.
+        """
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self.index.blocks)
+        return self._spatial_index
+
+    def blocks_on_page(self, page_idx):
+        """
+        Returns all the blocks on the given page in document order, including blocks nested in chunks.
+        """
+        return self.spatial_index.blocks_on_page(page_idx)
+
+    def blocks_in_region(self, page_idx, bbox):
+        """
+        Returns the blocks on the given page whose bounding box intersects bbox, given as (x0, y0, x1, y1), in document order.
+        """
+        return self.spatial_index.blocks_in_region(page_idx, bbox)
+
+    def block_at(self, page_idx, x, y):
+        """
+        Returns the innermost block on the given page whose bounding box contains the point (x, y) or None.
+        """
+        return self.spatial_index.block_at(page_idx, x, y)
+
     def chunks(self):
         """
         Returns all the chunks in the document. Chunking automatically splits the document into paragraphs, lists, and tables without any prior knowledge of the document structure.
         """
-        return self.root_node.chunks()
+        return list(self.index.chunks)
     def tables(self):
         """
         Returns all the tables in the document. This is useful for getting all the tables in a document.
         """
-        return self.root_node.tables()
+        return list(self.index.tables)
     def sections(self):
         """
         Returns all the sections in the document. This is useful for getting all the sections in a document.
         """
-        return self.root_node.sections()
+        return list(self.index.sections)
+    def paragraphs(self):
+        """
+        Returns all the paragraphs in the document.
+        """
+        return list(self.index.paragraphs)
+    def get_block(self, block_idx):
+        """
+        Returns the block with the given block_idx as returned by the parser or None if there is no such block.
+        """
+        return self.index.blocks_by_idx.get(block_idx)
+    def chunks_on_page(self, page_idx):
+        """
+        Returns the chunks on the given page in document order.
+        """
+        return list(self.index.chunks_by_page.get(page_idx, []))
+
+    def pack_chunks(self, max_size=1000, length_function=len):
+        """
+        Returns the chunks of the document packed to about max_size, see ChunkPacker. Small chunks of a section are merged and large tables are split by rows.
+
+        Parameters
+        ----------
+        max_size: int
+            target maximum size of a packed chunk as measured by length_function
+        length_function: function
+            returns the size of a text, e.g. a token counter. Defaults to the number of characters.
+        """
+        return ChunkPacker(max_size, length_function).pack(self.root_node)
     
     def to_text(self, include_duplicates = False):
         """
@@ -529,16 +1134,22 @@ class Document:
         :param include_duplicates: bool
             If True, then text of all the sections is included. If False, then only the text of the top sections is included.
         """
-        text = ""
-
-        if include_duplicates:
-            for section in self.sections():
-                text = text + section.to_text(include_children=True, recurse=True) + "\n"
-        else:
-            for section in self.top_sections:
-                text = text + section.to_text(include_children=True, recurse=True) + "\n"
+        out = io.StringIO()
+        self.write_text(out, include_duplicates=include_duplicates)
+        return out.getvalue()
 
-        return text
+    def write_text(self, out, include_duplicates = False):
+        """
+        Writes text of a document to out by iterating through all the sections '\n'. Use it with an open file to stream large documents to disk.
+        :param out: file like object
+            object with a write method such as io.StringIO or an open text file
+        :param include_duplicates: bool
+            If True, then text of all the sections is included. If False, then only the text of the top sections is included.
+        """
+        sections = self.sections() if include_duplicates else self.top_sections
+        for section in sections:
+            section.write_text(out, include_children=True, recurse=True)
+            out.write("\n")
                    
     def to_html(self, include_duplicates = False):
         """
@@ -546,40 +1157,28 @@ class Document:
         :param include_duplicates: bool
             If True, then html of all the sections is included. If False, then only the html of the top sections is included.
         """
-        html_str = "<html>"
+        out = io.StringIO()
+        self.write_html(out, include_duplicates=include_duplicates)
+        return out.getvalue()
 
-        if include_duplicates:
-            for section in self.sections():
-                html_str = html_str + section.to_html(include_children=True, recurse=True)
-        else:
-            for section in self.top_sections:
-                html_str = html_str + section.to_html(include_children=True, recurse=True)
-
-        html_str = html_str + "</html>"
-        return html_str
+    def write_html(self, out, include_duplicates = False):
+        """
+        Writes html for the document to out by iterating through all the sections. Use it with an open file to stream large documents to disk.
+        :param out: file like object
+            object with a write method such as io.StringIO or an open text file
+        :param include_duplicates: bool
+            If True, then html of all the sections is included. If False, then only the html of the top sections is included.
+        """
+        out.write("<html>")
+        sections = self.sections() if include_duplicates else self.top_sections
+        for section in sections:
+            section.write_html(out, include_children=True, recurse=True)
+        out.write("</html>")
     
     def _get_top_sections(self):
         """
         Get the top sections of the document. A section is considered a top section if it is not a child of any other section in the document.
+        LayoutReader links every section to its parent, so a section is a top section when its parent is the root or another kind of block.
+        The sections are found with a walk of the tree, so the index is still only built when it is first used.
         """
-        top_sections = list()
-        sections = self.sections()
-        sections_len = len(sections)
-
-        # Iterate over all the sections
-        for i in range(sections_len):
-            is_top_section = True   # Assume current section is a top section
-
-            # Check if the current section is a child of any other section
-            for j in range(sections_len):
-                if i != j:
-                    if sections[i] in sections[j].children:
-                        # If current section is a child of any other section, then it is not a top section
-                        is_top_section = False
-                        break
-                    
-            if is_top_section:
-                # Append the top section to the list of top sections
-                top_sections.append(sections[i])
-
-        return top_sections
\ No newline at end of file
+        return [section for section in self.root_node.iter_preorder(tags=['header'], descend=_is_not_chunk) if not isinstance(section.parent, Section)]
@@ -0,0 +1,22 @@
+import importlib
+
+def _optional_import(name, extra):
+    """
+    Imports an optional dependency when it is first used, so importing llmsherpa.readers does not load packages that only some features need.
+
+    Parameters
+    ----------
+    name: str
+        name of the module, e.g. numpy
+    extra: str
+        extra of llmsherpa that installs the module, e.g. numpy, shard or async
+
+    Raises
+    ------
+    ImportError
+        if the module is not installed, with the pip command that installs it
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        raise ImportError(f"{name} is not installed, install it with pip install llmsherpa[{extra}]") from e
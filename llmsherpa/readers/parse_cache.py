@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+class ParseCache:
+    """
+    Content addressed on disk cache of parser results. Entries are keyed by a hash of the pdf bytes and the parser api url including its query parameters, and store the blocks returned by the parser as gzipped json.
+    The cache directory can be shared by several readers and processes.
+
+    Parameters
+    ----------
+    cache_dir: str
+        directory to store the cache entries in, it is created if it does not exist
+    max_size_bytes: int
+        maximum total size of the cache entries on disk. When a put takes the cache over it, least recently used entries are evicted until it is under 90% of the limit, so a cache at its limit is not scanned on every put. None means no limit.
+    max_age_seconds: float
+        entries older than this are treated as misses and removed. Puts also sweep the expired entries that are never read again, at most every quarter of max_age_seconds. None means entries never expire.
+
+    Attributes
+    ----------
+    hits: int
+        number of lookups that found an entry
+    misses: int
+        number of lookups that did not find an entry
+    """
+    suffix = ".json.gz"
+    # fraction of max_size_bytes that eviction after a put goes down to
+    low_water = 0.9
+
+    def __init__(self, cache_dir, max_size_bytes=None, max_age_seconds=None):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # total size of the entries as seen by this instance, counted on the first put and corrected by every eviction
+        self._size = None
+        self._last_sweep = 0.0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, pdf_data, parser_api_url, chunk_size=1024 * 1024):
+        """
+        Returns the cache key for the given pdf contents parsed with the given parser api url. Query parameters of the url are normalized so their order does not matter.
+        pdf_data can be bytes or a binary file, a file is hashed chunk by chunk and its position is restored afterwards.
+        """
+        url = urlparse(parser_api_url)
+        query = urlencode(sorted(parse_qsl(url.query, keep_blank_values=True)))
+        url = url._replace(query=query).geturl()
+        digest = hashlib.sha256(url.encode("utf-8"))
+        digest.update(b"\0")
+        if hasattr(pdf_data, "read"):
+            start = pdf_data.tell()
+            for chunk in iter(lambda: pdf_data.read(chunk_size), b""):
+                digest.update(chunk)
+            pdf_data.seek(start)
+        else:
+            digest.update(pdf_data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self.suffix)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """
+        Returns the blocks stored for the key or None if there is no valid entry.
+        """
+        path = self._path(key)
+        try:
+            if self.max_age_seconds is not None:
+                stat = os.stat(path)
+                if time.time() - stat.st_mtime > self.max_age_seconds:
+                    os.remove(path)
+                    self._add_size(-stat.st_size)
+                    self._count(False)
+                    return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                blocks = json.load(f)
+        except (OSError, ValueError):
+            self._count(False)
+            return None
+        # access time drives the least recently used eviction
+        try:
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+        except OSError:
+            pass
+        self._count(True)
+        return blocks
+
+    def put(self, key, blocks):
+        """
+        Stores the blocks for the key and evicts old entries if the cache is over its size limit or expired entries are due to be swept.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced_size = os.path.getsize(path)
+        except OSError:
+            replaced_size = 0
+        # write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+                f.write(json.dumps(blocks, separators=(",", ":")).encode("utf-8"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        now = time.time()
+        sweep = self.max_age_seconds is not None and now - self._last_sweep >= self.max_age_seconds / 4
+        if self.max_size_bytes is not None:
+            if self._size is None:
+                # the first put counts the entries that are already on disk
+                sweep = True
+            else:
+                self._add_size(os.path.getsize(path) - replaced_size)
+                sweep = sweep or self._size > self.max_size_bytes
+        if sweep:
+            self._evict(None if self.max_size_bytes is None else int(self.max_size_bytes * self.low_water))
+
+    def _add_size(self, size):
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+
+    def _entries(self):
+        entries = []
+        for dir_path, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                if file_name.endswith(self.suffix):
+                    try:
+                        stat = os.stat(os.path.join(dir_path, file_name))
+                    except OSError:
+                        continue
+                    entries.append((os.path.join(dir_path, file_name), stat))
+        return entries
+
+    def size(self):
+        """
+        Returns the total size in bytes of the cache entries on disk.
+        """
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def evict(self):
+        """
+        Removes expired entries and then least recently used entries until the cache fits in max_size_bytes.
+        """
+        self._evict(self.max_size_bytes)
+
+    def _evict(self, target_size):
+        now = time.time()
+        entries = []
+        for path, stat in self._entries():
+            if self.max_age_seconds is not None and now - stat.st_mtime > self.max_age_seconds:
+                self._remove(path)
+            else:
+                entries.append((path, stat))
+        total_size = sum(stat.st_size for _, stat in entries)
+        if target_size is not None:
+            entries.sort(key=lambda entry: entry[1].st_atime)
+            for path, stat in entries:
+                if total_size <= target_size:
+                    break
+                self._remove(path)
+                total_size -= stat.st_size
+        with self._lock:
+            self._size = total_size
+            self._last_sweep = now
+
+    def clear(self):
+        """
+        Removes all entries from the cache and resets the hit and miss counters.
+        """
+        for path, _ in self._entries():
+            self._remove(path)
+        with self._lock:
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
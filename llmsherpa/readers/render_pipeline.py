@@ -0,0 +1,179 @@
+import json
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from llmsherpa.readers.layout_reader import Document
+from llmsherpa.readers.parse_cache import ParseCache
+
+RenderedChunk = namedtuple("RenderedChunk", ["block_idx", "page_idx", "tag", "text", "context_text", "sections"])
+RenderedChunk.__doc__ = """
+A chunk of a document rendered by render_document
+
+Attributes
+----------
+block_idx: int
+    block_idx of the chunk as returned by the parser
+page_idx: int
+    page index of the chunk
+tag: str
+    tag of the chunk, para, list_item or table
+text: str
+    text of the chunk with its children
+context_text: str
+    text of the chunk with section information as returned by Block.to_context_text
+sections: list of str
+    titles of the sections the chunk is in, outermost first
+"""
+
+RenderedDocument = namedtuple("RenderedDocument", ["chunks", "top_sections", "num_blocks", "num_tables", "text", "html"])
+RenderedDocument.__doc__ = """
+The parts of a document that render_document produces. It holds only strings and numbers, so it is cheap to send between processes.
+
+Attributes
+----------
+chunks: list of RenderedChunk
+    the chunks of the document in document order
+top_sections: list of str
+    titles of the top sections of the document
+num_blocks: int
+    number of blocks in the layout tree
+num_tables: int
+    number of tables in the document
+text: str
+    text of the document as returned by Document.to_text, None unless include_text is True
+html: str
+    html of the document as returned by Document.to_html, None unless include_html is True
+"""
+
+RenderResult = namedtuple("RenderResult", ["index", "document", "error"])
+RenderResult.__doc__ = """
+Result of rendering one payload with render_documents
+
+Attributes
+----------
+index: int
+    position of the payload in the payloads given to render_documents
+document: RenderedDocument
+    rendered document or None if rendering failed
+error: Exception
+    exception raised while rendering or None if rendering succeeded
+"""
+
+def _load_blocks(payload):
+    if isinstance(payload, (bytes, bytearray, str)):
+        payload = json.loads(payload)
+    if isinstance(payload, dict):
+        # a whole parser response
+        payload = payload['return_dict']['result']['blocks']
+    return payload
+
+def render_document(payload, include_text=False, include_html=False):
+    """
+    Builds the layout tree of a document and renders its chunks. This is the work render_documents does in the worker processes, it can also be called directly.
+
+    Parameters
+    ----------
+    payload: list, bytes or str
+        blocks returned by the parser API, or the json text of the blocks or of the whole parser response
+    include_text: bool
+        If True, then the text of the whole document is rendered too
+    include_html: bool
+        If True, then the html of the whole document is rendered too
+
+    Returns
+    -------
+    RenderedDocument
+    """
+    doc = Document(_load_blocks(payload), keep_json=False)
+    chunks = []
+    for chunk in doc.chunks():
+        chunks.append(RenderedChunk(
+            chunk.block_idx,
+            chunk.page_idx,
+            chunk.tag,
+            chunk.to_text(include_children=True, recurse=True),
+            chunk.to_context_text(),
+            [section.title for section in chunk.sections_path()],
+        ))
+    return RenderedDocument(
+        chunks,
+        [section.title for section in doc.top_sections],
+        len(doc.index.blocks),
+        len(doc.index.tables),
+        doc.to_text() if include_text else None,
+        doc.to_html() if include_html else None,
+    )
+
+_worker_caches = {}
+
+def _render_batch(batch, include_text, include_html, cache_dir):
+    # runs in a worker process, errors are returned so one bad payload does not fail the batch
+    results = []
+    for index, payload in batch:
+        try:
+            if cache_dir is not None:
+                if cache_dir not in _worker_caches:
+                    _worker_caches[cache_dir] = ParseCache(cache_dir)
+                key = payload
+                payload = _worker_caches[cache_dir].get(key)
+                if payload is None:
+                    raise KeyError(f"{key} is not in the cache")
+            results.append(RenderResult(index, render_document(payload, include_text, include_html), None))
+        except Exception as e:
+            results.append(RenderResult(index, None, e))
+    return results
+
+def render_documents(payloads, max_workers=None, chunksize=1, include_text=False, include_html=False, cache=None):
+    """
+    Builds and renders many documents in a pool of worker processes, so the work is spread over all cores instead of being serialized by the GIL.
+    Payloads are sent to the workers in batches of chunksize and only the rendered strings come back, the Block trees never leave the workers.
+    Results are yielded in the order of payloads. A failure in one payload does not stop the others, it is reported in the error of its result instead.
+
+    Parameters
+    ----------
+    payloads: iterable
+        blocks returned by the parser API or their json text, see render_document. If cache is given, then the ParseCache keys of the documents instead.
+        This can be a lazy iterable, it is consumed only as fast as results are produced.
+    max_workers: int
+        number of worker processes. Defaults to the number of cpus.
+    chunksize: int
+        number of payloads sent to a worker at a time. Larger batches lower the overhead for many small documents.
+    include_text: bool
+        If True, then the text of every document is rendered too
+    include_html: bool
+        If True, then the html of every document is rendered too
+    cache: ParseCache
+        If given, then the workers read the blocks from this cache, so only the keys are sent to them
+
+    Returns
+    -------
+    iterator of RenderResult
+        one (index, document, error) result per payload
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    chunksize = max(chunksize, 1)
+    cache_dir = cache.cache_dir if cache is not None else None
+    inputs = enumerate(payloads)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        def submit_next():
+            batch = []
+            for item in inputs:
+                batch.append(item)
+                if len(batch) == chunksize:
+                    break
+            if batch:
+                pending.append(executor.submit(_render_batch, batch, include_text, include_html, cache_dir))
+            return len(batch) > 0
+
+        try:
+            # two batches per worker keep the workers busy while results are consumed
+            while len(pending) < 2 * max_workers and submit_next():
+                pass
+            while pending:
+                results = pending.popleft().result()
+                submit_next()
+                yield from results
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,92 @@
+import math
+
+class _RTree:
+    """
+    Static R-tree over bounding boxes packed with the sort tile recursive algorithm. Every node holds up to node_size entries.
+    """
+    node_size = 16
+
+    def __init__(self, items):
+        # items are (x0, y0, x1, y1, value), a node is (x0, y0, x1, y1, entries, is_leaf)
+        nodes = self._pack(items, True)
+        while len(nodes) > 1:
+            nodes = self._pack(nodes, False)
+        self.root = nodes[0] if nodes else None
+
+    def _pack(self, entries, is_leaf):
+        size = self.node_size
+        num_nodes = -(-len(entries) // size)
+        num_slices = max(math.ceil(math.sqrt(num_nodes)), 1)
+        slice_size = num_slices * size
+        entries = sorted(entries, key=lambda e: e[0] + e[2])
+        nodes = []
+        for i in range(0, len(entries), slice_size):
+            vertical_slice = sorted(entries[i:i + slice_size], key=lambda e: e[1] + e[3])
+            for j in range(0, len(vertical_slice), size):
+                group = vertical_slice[j:j + size]
+                nodes.append((min(e[0] for e in group), min(e[1] for e in group), max(e[2] for e in group), max(e[3] for e in group), group, is_leaf))
+        return nodes
+
+    def search(self, x0, y0, x1, y1):
+        """
+        Returns the values whose boxes intersect the box, in no particular order.
+        """
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            for entry in node[4]:
+                if entry[0] <= x1 and entry[2] >= x0 and entry[1] <= y1 and entry[3] >= y0:
+                    if node[5]:
+                        found.append(entry[4])
+                    else:
+                        stack.append(entry)
+        return found
+
+class SpatialIndex:
+    """
+    Per page index of the blocks of a document. Blocks are grouped by page when the index is built, the R-tree over the bounding boxes of a page is built the first time the page is queried.
+    Results are in document order. Blocks without a bounding box of 4 values are returned by blocks_on_page but never match a region.
+
+    Parameters
+    ----------
+    blocks: list
+        blocks in document order, e.g. DocumentIndex.blocks
+    """
+    def __init__(self, blocks):
+        self.pages = {}
+        for row, block in enumerate(blocks):
+            self.pages.setdefault(block.page_idx, []).append((row, block))
+        self.trees = {}
+
+    def _tree(self, page_idx):
+        tree = self.trees.get(page_idx)
+        if tree is None:
+            items = [(*block.bbox, (row, block)) for row, block in self.pages.get(page_idx, []) if len(block.bbox) == 4]
+            tree = self.trees[page_idx] = _RTree(items)
+        return tree
+
+    def blocks_on_page(self, page_idx):
+        """
+        Returns the blocks on the page.
+        """
+        return [block for _, block in self.pages.get(page_idx, [])]
+
+    def blocks_in_region(self, page_idx, bbox):
+        """
+        Returns the blocks on the page whose bounding box intersects bbox, given as (x0, y0, x1, y1).
+        """
+        found = self._tree(page_idx).search(*bbox)
+        found.sort(key=lambda item: item[0])
+        return [block for _, block in found]
+
+    def block_at(self, page_idx, x, y):
+        """
+        Returns the block with the smallest bounding box that contains the point or None. Of blocks with the same box the last one in document order is returned, i.e. the innermost one.
+        """
+        best = None
+        for row, block in self._tree(page_idx).search(x, y, x, y):
+            area = (block.bbox[2] - block.bbox[0]) * (block.bbox[3] - block.bbox[1])
+            if best is None or (area, -row) < best[0]:
+                best = ((area, -row), block)
+        return best[1] if best is not None else None
@@ -0,0 +1,63 @@
+import unittest
+import json
+import os
+import tempfile
+from llmsherpa.readers import Document, DocumentArchive, save_document, load_document
+
+
+class TestDocumentArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "doc.bin")
+
+    def get_document(self, file_name, keep_json=True):
+        with open(os.path.join(os.path.dirname(__file__), file_name)) as f:
+            return Document(json.load(f), keep_json=keep_json)
+
+    def block_fields(self, block):
+        return (block.tag, block.level, block.page_idx, block.block_idx, block.top, block.left, tuple(block.bbox), tuple(block.sentences), len(block.children))
+
+    def test_save_load(self):
+        for file_name in ["chunk_test.json", "nested_list_test.json", "ooo_header_test.json", "table_test.json"]:
+            doc = self.get_document(file_name)
+            save_document(doc, self.path)
+            loaded_doc = load_document(self.path)
+            self.assertIsNone(loaded_doc.json)
+            self.assertEqual(loaded_doc.to_html(include_duplicates=True), doc.to_html(include_duplicates=True))
+            self.assertEqual(loaded_doc.to_text(), doc.to_text())
+            self.assertEqual([c.to_context_text() for c in loaded_doc.chunks()], [c.to_context_text() for c in doc.chunks()])
+            self.assertEqual([self.block_fields(b) for b in loaded_doc.index.blocks], [self.block_fields(b) for b in doc.index.blocks])
+
+    def test_save_compacted(self):
+        doc = self.get_document("table_test.json", keep_json=False)
+        save_document(doc, self.path)
+        self.assertEqual(load_document(self.path).to_html(), doc.to_html())
+
+    def test_lazy_block(self):
+        doc = self.get_document("nested_list_test.json")
+        blocks = doc.index.blocks
+        save_document(doc, self.path)
+        with DocumentArchive(self.path) as archive:
+            self.assertEqual(len(archive), len(blocks))
+            i = blocks.index(doc.chunks()[-1])
+            self.assertEqual(archive.tag(i), blocks[i].tag)
+            self.assertEqual(archive.sentences(i), list(blocks[i].sentences))
+            block = archive.block(i)
+            self.assertIs(archive.block(i), block)
+            self.assertEqual(block.to_context_text(), blocks[i].to_context_text())
+            self.assertEqual([p.to_text() for p in block.parent_chain()[1:]], [p.to_text() for p in blocks[i].parent_chain()[1:]])
+            # the whole document reuses the blocks that were already built
+            loaded_doc = archive.document()
+            self.assertIs(loaded_doc.chunks()[-1], block)
+            self.assertEqual(loaded_doc.to_html(), doc.to_html())
+
+    def test_not_an_archive(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not an archive")
+        with self.assertRaises(ValueError):
+            DocumentArchive(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
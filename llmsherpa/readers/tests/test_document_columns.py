@@ -0,0 +1,57 @@
+import unittest
+import importlib.util
+import json
+import os
+from unittest import mock
+from llmsherpa.readers import Document, DocumentColumns
+from llmsherpa.readers import document_columns
+
+
+class TestDocumentColumns(unittest.TestCase):
+
+    def get_document(self, file_name):
+        with open(os.path.join(os.path.dirname(__file__), file_name)) as f:
+            return Document(json.load(f))
+
+    def test_document_columns(self):
+        doc = self.get_document("table_test.json")
+        blocks = doc.index.blocks
+        for i, block in enumerate(blocks):
+            # bounding boxes are not in the test files, give some blocks one
+            if block.page_idx == 5:
+                block.bbox = [10.0, 10.0 * i, 100.0, 10.0 * i + 5]
+        columns = DocumentColumns(blocks)
+        self.assertEqual(len(columns), len(blocks))
+        for i, block in enumerate(blocks):
+            self.assertEqual(columns.tag_names[columns.tags[i]], block.tag)
+            self.assertEqual(columns.page_indices[i], block.page_idx)
+            self.assertEqual(columns.sentences(i), list(block.sentences))
+            self.assertEqual(columns.parents[i], blocks.index(block.parent) if block.parent in blocks else -1)
+        on_page = [b for b in blocks if b.page_idx == 5]
+        region = (0, on_page[0].bbox[1], 50, on_page[0].bbox[3])
+        queries = [
+            ({"tags": ["table"]}, doc.tables()),
+            ({"page_range": (5, 5)}, on_page),
+            ({"tags": ["para", "header"], "page_range": (0, 4)}, [b for b in blocks if b.tag in ["para", "header"] and b.page_idx <= 4]),
+            ({"region": region}, on_page[:1]),
+        ]
+        for kwargs, expected in queries:
+            self.assertEqual(columns.select(**kwargs), expected)
+        self.assertIs(doc.columns, doc.columns)
+
+    def test_document_columns_without_numpy(self):
+        with mock.patch.object(document_columns, "_optional_import", side_effect=ImportError("numpy is not installed")):
+            columns = self.get_document("table_test.json").columns
+            self.assertEqual([b.page_idx for b in columns.select(tags=["table"], page_range=(0, 10))], [5])
+            self.assertEqual(columns.select(region=(0, 0, 1000, 1000)), [])
+            with self.assertRaises(ImportError):
+                columns.to_numpy("levels")
+
+    @unittest.skipIf(importlib.util.find_spec("numpy") is None, "numpy is not installed")
+    def test_document_columns_numpy(self):
+        columns = self.get_document("chunk_test.json").columns
+        self.assertEqual(columns.to_numpy("levels").tolist(), [b.level for b in columns.blocks])
+        self.assertEqual(columns.to_numpy("bboxes").shape, (len(columns), 4))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,431 @@
+import unittest
+import importlib.util
+import asyncio
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib3.filepost import encode_multipart_formdata
+from llmsherpa.readers import LayoutPDFReader
+from llmsherpa.readers import ParseCache
+from llmsherpa.readers import HistogramSink
+from llmsherpa.readers import AsyncLayoutPDFReader
+from llmsherpa.readers import async_file_reader
+from llmsherpa.readers.file_reader import _MultipartFileBody
+from llmsherpa.readers.optional_dependencies import _optional_import
+
+
+class ParserHandler(BaseHTTPRequestHandler):
+    """
+    Serves pdf downloads on GET and a canned parser response on POST.
+    """
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.endswith("missing.pdf"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = b"%PDF-1.4 " + self.path.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request_body = self.rfile.read(length)
+        self.server.uploads.append(request_body)
+        self.server.post_paths.append(self.path)
+        if self.path.startswith("/slow"):
+            time.sleep(0.5)
+        if self.path.startswith("/flaky") and self.server.flaky_failures > 0:
+            self.server.flaky_failures -= 1
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/pages"):
+            self.send_blocks(self.page_blocks(request_body))
+            return
+        if b"broken.pdf" in request_body:
+            self.send_response(500)
+            self.end_headers()
+            return
+        self.send_blocks(self.server.blocks)
+
+    def page_blocks(self, request_body):
+        # a header and a para per page of the uploaded pdf, the header is the width of the page so pages can be told apart
+        pdf_data = request_body[request_body.index(b"%PDF"):request_body.rindex(b"%%EOF") + 5]
+        blocks = []
+        for page_idx, page in enumerate(_optional_import("pypdf", "shard").PdfReader(io.BytesIO(pdf_data)).pages):
+            width = int(page.mediabox.width)
+            blocks.append({"tag": "header", "page_idx": page_idx, "block_idx": 2 * page_idx, "level": 0, "sentences": [f"Page {width}"]})
+            blocks.append({"tag": "para", "page_idx": page_idx, "block_idx": 2 * page_idx + 1, "level": 1, "sentences": [f"Text of page {width}."]})
+        return blocks
+
+    def send_blocks(self, blocks):
+        body = json.dumps({"return_dict": {"result": {"blocks": blocks}}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ParserServerTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join(os.path.dirname(__file__), "chunk_test.json")) as f:
+            blocks = json.load(f)
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ParserHandler)
+        cls.server.blocks = blocks
+        cls.server.uploads = []
+        cls.server.post_paths = []
+        cls.server.flaky_failures = 0
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+
+class TestLayoutPDFReader(ParserServerTestCase):
+
+    def get_reader(self):
+        return LayoutPDFReader(self.base_url + "/api/parseDocument")
+
+    def test_read_pdf_url(self):
+        doc = self.get_reader().read_pdf(self.base_url + "/files/a.pdf")
+        self.assertEqual(len(doc.chunks()), 5)
+        self.assertEqual(doc.chunks()[2].to_text(), "Article II")
+        self.assertEqual(doc.json, self.server.blocks)
+
+    def test_iter_chunks(self):
+        chunks = list(self.get_reader().iter_chunks("a.pdf", contents=b"%PDF-1.4"))
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(chunks[2][0].to_text(), "Article II")
+
+    def test_read_pdf_contents(self):
+        doc = self.get_reader().read_pdf("a.pdf", contents=b"%PDF-1.4")
+        self.assertEqual(len(doc.sections()), 2)
+
+    def test_read_pdf_path_streamed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "local.pdf")
+            pdf_data = b"%PDF-1.4 " + bytes(range(256)) * 10
+            with open(pdf_path, "wb") as f:
+                f.write(pdf_data)
+            reader = LayoutPDFReader(self.base_url + "/api/parseDocument", chunk_size=100)
+            doc = reader.read_pdf(pdf_path)
+        self.assertEqual(len(doc.chunks()), 5)
+        upload = self.server.uploads[-1]
+        self.assertIn(b'filename="local.pdf"', upload)
+        self.assertIn(pdf_data, upload)
+
+    def test_read_pdf_without_json(self):
+        doc = LayoutPDFReader(self.base_url + "/api/parseDocument", keep_json=False).read_pdf("a.pdf", contents=b"%PDF-1.4")
+        self.assertIsNone(doc.json)
+        self.assertIsNone(doc.chunks()[0].block_json)
+        self.assertEqual(doc.to_text(), self.get_reader().read_pdf("a.pdf", contents=b"%PDF-1.4").to_text())
+
+    def test_read_pdf_download_error(self):
+        with self.assertRaises(ValueError):
+            self.get_reader().read_pdf(self.base_url + "/files/missing.pdf")
+
+    def test_multipart_body(self):
+        pdf_data = b"%PDF-1.4 " + bytes(range(256)) * 10
+        body = _MultipartFileBody(("a.pdf", pdf_data, "application/pdf"), 100)
+        boundary = body.content_type.split("boundary=")[1]
+        expected, content_type = encode_multipart_formdata({"file": ("a.pdf", pdf_data, "application/pdf")}, boundary=boundary)
+        self.assertEqual(content_type, body.content_type)
+        self.assertEqual(b"".join(body), expected)
+        self.assertEqual(len(body), len(expected))
+        # file bodies are streamed from the current position and can be sent again
+        with tempfile.TemporaryFile() as f:
+            f.write(b"junk" + pdf_data)
+            f.seek(4)
+            body = _MultipartFileBody(("a.pdf", f, "application/pdf"), 100)
+            body.head = expected[:len(body.head)]
+            body.tail = expected[-len(body.tail):]
+            self.assertEqual(b"".join(body), expected)
+            self.assertEqual(b"".join(body), expected)
+            self.assertEqual(len(body), len(expected))
+
+    def test_read_pdf_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ParseCache(cache_dir)
+            reader = LayoutPDFReader(self.base_url + "/api/parseDocument", cache=cache)
+            uploads = len(self.server.uploads)
+            doc = reader.read_pdf("a.pdf", contents=b"%PDF-1.4 cached")
+            cached_doc = reader.read_pdf("b.pdf", contents=b"%PDF-1.4 cached")
+            self.assertEqual(len(self.server.uploads), uploads + 1)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            self.assertEqual(cached_doc.to_text(), doc.to_text())
+
+    def test_retries(self):
+        self.server.flaky_failures = 2
+        reader = LayoutPDFReader(self.base_url + "/flaky/api", retries=2, backoff_factor=0)
+        doc = reader.read_pdf("a.pdf", contents=b"%PDF-1.4")
+        self.assertEqual(len(doc.chunks()), 5)
+        self.assertEqual(self.server.flaky_failures, 0)
+        self.server.flaky_failures = 3
+        with self.assertRaises(ValueError):
+            reader.read_pdf("a.pdf", contents=b"%PDF-1.4")
+        self.server.flaky_failures = 0
+
+    def test_parser_urls_round_robin(self):
+        reader = LayoutPDFReader([self.base_url + "/a/api", self.base_url + "/b/api"])
+        del self.server.post_paths[:]
+        for _ in range(4):
+            reader.read_pdf("a.pdf", contents=b"%PDF-1.4")
+        self.assertEqual(self.server.post_paths, ["/a/api", "/b/api", "/a/api", "/b/api"])
+
+    def test_timeout_and_connection_errors_go_to_next_url(self):
+        # nothing listens on the port of a closed server
+        closed_server = ThreadingHTTPServer(("127.0.0.1", 0), ParserHandler)
+        closed_url = f"http://127.0.0.1:{closed_server.server_address[1]}/api"
+        closed_server.server_close()
+        reader = LayoutPDFReader([self.base_url + "/slow/api", closed_url, self.base_url + "/api"], timeout=urllib3.Timeout(connect=1.0, read=0.1), retries=2, backoff_factor=0)
+        doc = reader.read_pdf("a.pdf", contents=b"%PDF-1.4")
+        self.assertEqual(len(doc.chunks()), 5)
+        reader = LayoutPDFReader(self.base_url + "/slow/api", timeout=0.1, retries=1, backoff_factor=0)
+        with self.assertRaises(urllib3.exceptions.HTTPError):
+            reader.read_pdf("a.pdf", contents=b"%PDF-1.4")
+
+    def test_metrics(self):
+        sink = HistogramSink()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            reader = LayoutPDFReader(self.base_url + "/api/parseDocument", cache=ParseCache(cache_dir), metrics=sink)
+            reader.read_pdf(self.base_url + "/files/metrics.pdf")
+            reader.read_pdf(self.base_url + "/files/metrics.pdf")
+        summary = sink.summary()
+        self.assertEqual(summary["download.bytes"]["max"], len(b"%PDF-1.4 /files/metrics.pdf"))
+        self.assertEqual(summary["download.seconds"]["count"], 2)
+        self.assertEqual((summary["cache.misses"]["count"], summary["cache.hits"]["count"]), (1, 1))
+        self.assertEqual(summary["parse.seconds"]["count"], 1)
+        self.assertEqual(summary["decode.seconds"]["count"], 1)
+        self.assertGreater(summary["parse.response_bytes"]["max"], summary["parse.upload_bytes"]["max"])
+        self.assertEqual(summary["document.chunks"]["max"], 5)
+        self.assertEqual(summary["build.seconds"]["count"], 2)
+        self.assertEqual(summary["read_pdf.seconds"]["count"], 2)
+        sink.reset()
+        LayoutPDFReader(self.base_url + "/api/parseDocument", metrics=sink).read_pdf("a.pdf", contents=b"%PDF-1.4")
+        summary = sink.summary()
+        self.assertEqual(summary["decode.seconds"]["count"], 1)
+        self.assertGreaterEqual(summary["read_pdf.seconds"]["max"], summary["decode.seconds"]["max"] + summary["build.seconds"]["max"])
+
+    def read_concurrently(self, reader, path_or_url, contents=None, num_threads=4):
+        results = [None] * num_threads
+        def read(i):
+            try:
+                results[i] = reader.read_pdf(path_or_url, contents=contents)
+            except Exception as e:
+                results[i] = e
+        threads = [threading.Thread(target=read, args=(i,)) for i in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_single_flight(self):
+        sink = HistogramSink()
+        reader = LayoutPDFReader(self.base_url + "/slow/api", single_flight=True, metrics=sink)
+        uploads = len(self.server.uploads)
+        docs = self.read_concurrently(reader, self.base_url + "/files/shared.pdf")
+        self.assertEqual(len(self.server.uploads), uploads + 1)
+        self.assertEqual(sink.summary()["single_flight.shared"]["count"], 3)
+        # every caller gets its own document
+        self.assertEqual(len(set(map(id, docs))), 4)
+        for doc in docs:
+            self.assertEqual(len(doc.chunks()), 5)
+        docs = self.read_concurrently(reader, "a.pdf", contents=b"%PDF-1.4 shared")
+        self.assertEqual(len(self.server.uploads), uploads + 2)
+        self.assertEqual(docs[0].to_text(), docs[3].to_text())
+        # calls after the shared read are done read again
+        reader.read_pdf("a.pdf", contents=b"%PDF-1.4 shared")
+        self.assertEqual(len(self.server.uploads), uploads + 3)
+        self.assertEqual(reader._in_flight, {})
+
+    def test_single_flight_shares_errors(self):
+        reader = LayoutPDFReader(self.base_url + "/slow/api", single_flight=True)
+        uploads = len(self.server.uploads)
+        results = self.read_concurrently(reader, "broken.pdf", contents=b"%PDF-1.4 broken")
+        self.assertEqual(len(self.server.uploads), uploads + 1)
+        for result in results:
+            self.assertIsInstance(result, ValueError)
+
+    def test_read_pdfs_ordered(self):
+        urls = [self.base_url + f"/files/{i}.pdf" for i in range(10)]
+        results = list(self.get_reader().read_pdfs(urls, max_workers=3, ordered=True))
+        self.assertEqual([r.path_or_url for r in results], urls)
+        for result in results:
+            self.assertIsNone(result.error)
+            self.assertEqual(len(result.document.chunks()), 5)
+
+    def test_optional_import_names_extra(self):
+        self.assertIs(_optional_import("json", "shard"), json)
+        with self.assertRaisesRegex(ImportError, r"pip install llmsherpa\[shard\]"):
+            _optional_import("llmsherpa_missing_module", "shard")
+
+    def test_read_pdfs_max_in_flight_below_max_workers(self):
+        consumed = []
+        def urls():
+            for i in range(6):
+                consumed.append(i)
+                yield self.base_url + f"/files/{i}.pdf"
+        results = []
+        for result in self.get_reader().read_pdfs(urls(), max_workers=4, max_in_flight=1, ordered=True):
+            # the pdf of this result and the next one, which is submitted before the result is yielded
+            self.assertLessEqual(len(consumed) - len(results), 2)
+            results.append(result)
+        self.assertEqual([r.path_or_url for r in results], [self.base_url + f"/files/{i}.pdf" for i in range(6)])
+        with self.assertRaises(ValueError):
+            list(self.get_reader().read_pdfs(urls(), max_in_flight=0))
+
+    def test_read_pdfs_reports_errors(self):
+        urls = [self.base_url + f"/files/{i}.pdf" for i in range(4)]
+        urls.append(self.base_url + "/files/broken.pdf")
+        results = list(self.get_reader().read_pdfs(iter(urls), max_workers=2, max_in_flight=2))
+        self.assertEqual(sorted(r.path_or_url for r in results), sorted(urls))
+        errors = [r for r in results if r.error is not None]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].path_or_url, urls[-1])
+        self.assertIsNone(errors[0].document)
+        self.assertIsInstance(errors[0].error, ValueError)
+
+
+@unittest.skipIf(importlib.util.find_spec("pypdf") is None, "pypdf is not installed")
+class TestShardedLayoutPDFReader(ParserServerTestCase):
+
+    def make_pdf(self, num_pages):
+        writer = _optional_import("pypdf", "shard").PdfWriter()
+        for i in range(num_pages):
+            writer.add_blank_page(width=100 + i, height=100)
+        pdf_data = io.BytesIO()
+        writer.write(pdf_data)
+        return pdf_data.getvalue()
+
+    def test_sharded_read_pdf(self):
+        pdf_data = self.make_pdf(7)
+        doc = LayoutPDFReader(self.base_url + "/pages/api").read_pdf("a.pdf", contents=pdf_data)
+        uploads = len(self.server.uploads)
+        sharded_doc = LayoutPDFReader(self.base_url + "/pages/api", pages_per_shard=3, max_shard_workers=2).read_pdf("a.pdf", contents=pdf_data)
+        self.assertEqual(len(self.server.uploads), uploads + 3)
+        self.assertEqual(sharded_doc.json, doc.json)
+        self.assertEqual(sharded_doc.to_html(), doc.to_html())
+        self.assertEqual([(b.block_idx, b.page_idx) for b in sharded_doc.index.blocks], [(b.block_idx, b.page_idx) for b in doc.index.blocks])
+        self.assertEqual([s.title for s in sharded_doc.sections()], [f"Page {100 + i}" for i in range(7)])
+
+    def test_sharded_read_pdf_path(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "local.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(self.make_pdf(4))
+            reader = LayoutPDFReader(self.base_url + "/pages/api", pages_per_shard=2)
+            doc = reader.read_pdf(pdf_path)
+        self.assertEqual([c.page_idx for c in doc.chunks()], [0, 1, 2, 3])
+        self.assertEqual([c.block_idx for c in doc.chunks()], [1, 3, 5, 7])
+
+    def test_unsplittable_pdf_is_parsed_whole(self):
+        writer = _optional_import("pypdf", "shard").PdfWriter()
+        for _ in range(4):
+            writer.add_blank_page(width=100, height=100)
+        writer.encrypt("secret")
+        encrypted_data = io.BytesIO()
+        writer.write(encrypted_data)
+        reader = LayoutPDFReader(self.base_url + "/api/parseDocument", pages_per_shard=2)
+        for pdf_data in [b"%PDF-1.4 junk", encrypted_data.getvalue()]:
+            uploads = len(self.server.uploads)
+            doc = reader.read_pdf("a.pdf", contents=pdf_data)
+            self.assertEqual(len(self.server.uploads), uploads + 1)
+            self.assertEqual(len(doc.chunks()), 5)
+
+    def test_shards_are_built_when_sent(self):
+        reader = LayoutPDFReader(self.base_url + "/pages/api", pages_per_shard=2, max_shard_workers=1)
+        built = []
+        build_shard = reader._build_shard
+        def recording_build_shard(pdf, pdf_file, first_page):
+            built.append(first_page)
+            return build_shard(pdf, pdf_file, first_page)
+        reader._build_shard = recording_build_shard
+        read_blocks = reader._read_blocks
+        built_when_sent = []
+        def recording_read_blocks(pdf_file):
+            built_when_sent.append(len(built))
+            return read_blocks(pdf_file)
+        reader._read_blocks = recording_read_blocks
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "local.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(self.make_pdf(7))
+            doc = reader.read_pdf(pdf_path)
+        self.assertEqual(built, [0, 2, 4, 6])
+        self.assertEqual(built_when_sent, [1, 2, 3, 4])
+        self.assertEqual([s.title for s in doc.sections()], [f"Page {100 + i}" for i in range(7)])
+
+    def test_small_pdf_is_not_split(self):
+        uploads = len(self.server.uploads)
+        doc = LayoutPDFReader(self.base_url + "/pages/api", pages_per_shard=3).read_pdf("a.pdf", contents=self.make_pdf(3))
+        self.assertEqual(len(self.server.uploads), uploads + 1)
+        self.assertEqual(len(doc.sections()), 3)
+
+
+@unittest.skipIf(importlib.util.find_spec("aiohttp") is None, "aiohttp is not installed")
+class TestAsyncLayoutPDFReader(ParserServerTestCase):
+
+    def test_read_pdf(self):
+        async def read():
+            async with AsyncLayoutPDFReader(self.base_url + "/api/parseDocument") as reader:
+                return await reader.read_pdf(self.base_url + "/files/a.pdf")
+        doc = asyncio.run(read())
+        self.assertEqual(len(doc.chunks()), 5)
+        self.assertEqual(doc.chunks()[2].to_text(), "Article II")
+
+    def test_read_pdf_builds_off_the_loop(self):
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="build") as executor:
+            async def read():
+                async with AsyncLayoutPDFReader(self.base_url + "/api/parseDocument", executor=executor, keep_json=False) as reader:
+                    return await reader.read_pdf("a.pdf", contents=b"%PDF-1.4"), threading.current_thread()
+            original_init = async_file_reader.Document.__init__
+            build_threads = []
+            def recording_init(document, *args, **kwargs):
+                build_threads.append(threading.current_thread())
+                original_init(document, *args, **kwargs)
+            async_file_reader.Document.__init__ = recording_init
+            try:
+                doc, loop_thread = asyncio.run(read())
+            finally:
+                async_file_reader.Document.__init__ = original_init
+        self.assertEqual(len(doc.chunks()), 5)
+        self.assertIsNone(doc.json)
+        self.assertEqual(len(build_threads), 1)
+        self.assertIsNot(build_threads[0], loop_thread)
+        self.assertTrue(build_threads[0].name.startswith("build"))
+
+    def test_read_pdfs(self):
+        urls = [self.base_url + f"/files/{i}.pdf" for i in range(10)]
+        urls.append(self.base_url + "/files/missing.pdf")
+        async def read():
+            async with AsyncLayoutPDFReader(self.base_url + "/api/parseDocument", max_connections_per_host=2) as reader:
+                return [result async for result in reader.read_pdfs(urls, max_in_flight=4, ordered=True)]
+        results = asyncio.run(read())
+        self.assertEqual([r.path_or_url for r in results], urls)
+        for result in results[:-1]:
+            self.assertEqual(len(result.document.chunks()), 5)
+        self.assertIsInstance(results[-1].error, ValueError)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import json
+import os
+import random
+from llmsherpa.readers import Document
+from llmsherpa.readers import Histogram, HistogramSink
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_histogram_percentiles(self):
+        histogram = Histogram()
+        values = [random.Random(0).lognormvariate(0, 2) for _ in range(10000)]
+        for value in values:
+            histogram.add(value)
+        values.sort()
+        for q in [1, 50, 90, 99, 100]:
+            exact = values[max(int(q / 100 * len(values)) - 1, 0)]
+            self.assertAlmostEqual(histogram.percentile(q) / exact, 1, delta=0.06)
+        self.assertEqual(histogram.count, len(values))
+        self.assertEqual((histogram.min, histogram.max), (values[0], values[-1]))
+        self.assertAlmostEqual(histogram.mean(), sum(values) / len(values))
+        self.assertIsNone(Histogram().percentile(50))
+
+    def test_histogram_zero_values(self):
+        histogram = Histogram()
+        for value in [0, 0, 0, 5]:
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(50), 0)
+        self.assertEqual(histogram.percentile(100), 5)
+
+    def test_document_metrics(self):
+        with open(os.path.join(os.path.dirname(__file__), "chunk_test.json")) as f:
+            blocks_json = json.load(f)
+        sink = HistogramSink()
+        recorded = []
+        doc = Document(blocks_json, metrics=sink)
+        Document(blocks_json, metrics=lambda name, value: recorded.append((name, value)))
+        summary = sink.summary()
+        self.assertEqual(summary["document.chunks"]["max"], len(doc.chunks()))
+        self.assertEqual(summary["document.sections"]["p50"], len(doc.sections()))
+        self.assertEqual(summary["document.seconds"]["count"], 1)
+        self.assertEqual([name for name, _ in recorded], ["document.seconds", "document.blocks", "document.sections", "document.tables", "document.chunks"])
+        sink.reset()
+        self.assertEqual(sink.summary(), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import json
+import os
+from llmsherpa.readers.json_stream import iter_json_array
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestJSONStream(unittest.TestCase):
+
+    def test_blocks(self):
+        with open(os.path.join(os.path.dirname(__file__), "table_test.json")) as f:
+            blocks = json.load(f)
+        response = {
+            "status": 200,
+            "return_dict": {
+                "page_dim": [612, 792],
+                "num_pages": 12,
+                "result": {"title": "[x]", "blocks": blocks, "after": {"a": [1, 2]}},
+            },
+        }
+        data = json.dumps(response, indent=2).encode("utf-8")
+        for size in [1, 7, 1024, len(data)]:
+            self.assertEqual(list(iter_json_array(split(data, size), ["return_dict", "result", "blocks"])), blocks)
+
+    def test_values_split_across_chunks(self):
+        values = [12.5e3, -7, 0, True, None, "é ü 汉字 \"]}", {"k": "\\u00e9[{"}, [], {}, 123456789]
+        data = json.dumps({"a": {"b": values}}, ensure_ascii=False).encode("utf-8")
+        for size in [1, 2, 3, 5]:
+            self.assertEqual(list(iter_json_array(split(data, size), ["a", "b"])), values)
+        self.assertEqual(list(iter_json_array([b'{"a": []}'], ["a"])), [])
+
+    def test_errors(self):
+        with self.assertRaises(KeyError):
+            list(iter_json_array([b'{"a": {"c": 1}}'], ["a", "b"]))
+        with self.assertRaises(KeyError):
+            list(iter_json_array([b'{}'], ["a"]))
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array([b'{"a": [1, 2'], ["a"]))
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array([b'{"a": [1 2]}'], ["a"]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
+import io
 import json
 import os
 import re
+import tracemalloc
 from llmsherpa.readers import LayoutReader
 from llmsherpa.readers import Document
 
@@ -22,10 +24,10 @@ class TestLayoutReader(unittest.TestCase):
         # reader.debug(pdf)
         return doc
     
-    def get_document(self, file_name):
+    def get_document(self, file_name, keep_json=True):
         with open(os.path.join(os.path.dirname(__file__), file_name)) as f:
             doc_data = json.load(f)
-            doc = Document(doc_data)
+            doc = Document(doc_data, keep_json=keep_json)
         return doc
 
     def test_list_child_of_header(self):
@@ -94,6 +96,25 @@ class TestLayoutReader(unittest.TestCase):
         self.assertEqual(len(tables), 1)
         self.assertEqual(tables[0].to_html(), correct_html)
 
+    def test_table_rows_built_lazily(self):
+        doc = self.get_document("table_test.json")
+        table = doc.tables()[0]
+        self.assertIsNone(table._rows)
+        self.assertEqual(len(doc.chunks()), len(self.get_document("table_test.json").chunks()))
+        self.assertIsNone(table._rows)
+        self.assertEqual(len(table.headers), 1)
+        self.assertEqual(len(table.rows), 5)
+        self.assertIs(table.rows, table.rows)
+        self.assertEqual(table.rows[0].to_text(), " | BERT | 84.1/90.9 | 79.0/81.8 | 86.6/- | 93.2 | 91.3 | 92.3 | 90.0 | 70.4 | 88.0 | 60.6")
+        # compacted tables keep their rows lazy and compact them when they are built
+        table = self.get_document("table_test.json", keep_json=False).tables()[0]
+        self.assertIsNone(table._rows)
+        self.assertIsNone(table.rows[0].cells[0].block_json)
+        self.assertIsInstance(table.headers[0].sentences, tuple)
+        # rows can be replaced like any other attribute
+        table.rows = table.rows[:2]
+        self.assertEqual(table.to_text().count("\n"), 4)
+
     def test_paragraph_iterator(self):
         doc = self.read_layout("nested_list_test.json")
         paras = doc.paragraphs()
@@ -157,5 +178,170 @@ class TestLayoutReader(unittest.TestCase):
         correct_html = "<html><h1>Heading 1</h1><h2>Heading 2</h2><h2>Heading 3</h2></html>"
         self.assertEqual(doc.to_html(), correct_html)
 
+    def test_write_text_and_html(self):
+        doc = self.get_document("table_test.json")
+        out = io.StringIO()
+        doc.write_text(out, include_duplicates=True)
+        self.assertEqual(out.getvalue(), doc.to_text(include_duplicates=True))
+        out = io.StringIO()
+        doc.write_html(out)
+        self.assertEqual(out.getvalue(), doc.to_html())
+        table = doc.tables()[0]
+        out = io.StringIO()
+        table.write_text(out)
+        self.assertEqual(out.getvalue(), table.to_text())
+        self.assertTrue(table.to_text().startswith(" | "))
+
+    def test_document_index(self):
+        for file_name in ["chunk_test.json", "nested_list_test.json", "table_test.json", "ooo_header_child_test.json"]:
+            doc = self.get_document(file_name)
+            # the index is built on first use, not by the top sections
+            self.assertIsNone(doc._index)
+            self.assertEqual(doc.chunks(), doc.root_node.chunks())
+            self.assertEqual(doc.tables(), doc.root_node.tables())
+            self.assertEqual(doc.sections(), doc.root_node.sections())
+            self.assertEqual(doc.paragraphs(), doc.root_node.paragraphs())
+            self.assertIsNot(doc.chunks(), doc.chunks())
+        doc = self.get_document("table_test.json")
+        table = doc.tables()[0]
+        self.assertIs(doc.get_block(table.block_idx), table)
+        self.assertIsNone(doc.get_block(100000))
+        self.assertEqual(doc.chunks_on_page(5)[0], table)
+        self.assertEqual(doc.chunks_on_page(1000), [])
+
+    def test_parent_text_cached(self):
+        doc = self.read_layout("nested_list_test.json")
+        items = doc.children[1].children[0].children[1].children
+        self.assertEqual(items[0].parent_text(), items[1].parent_text())
+        self.assertEqual(doc.parent_text(), "")
+        self.assertEqual(items[0].parent_text(), "Article II\nSection 1\n1.2 One point two")
+        # every parent caches only its own text
+        self.assertEqual(items[0].parent._context, "1.2 One point two")
+
+    def test_parent_text_of_deeply_nested_list(self):
+        blocks = [{"tag": "header", "level": 0, "sentences": ["Article I"]}]
+        blocks += [{"tag": "list_item", "level": level, "sentences": [f"Item {level}"]} for level in range(1, 3001)]
+        doc = Document(blocks)
+        deepest = list(doc.root_node.iter_preorder())[-1]
+        tracemalloc.start()
+        text = deepest.to_context_text()
+        for item in deepest.parent_chain()[-100:]:
+            item.to_context_text()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertEqual(text, "Article I" + "\n".join(f"Item {level}" for level in range(1, 3000)) + "\nItem 3000")
+        # the texts of the parents are cached once, not once per depth
+        self.assertLess(peak, 5 * 1024 * 1024)
+
+    def test_compact_document(self):
+        for file_name in ["chunk_test.json", "nested_list_test.json", "table_test.json"]:
+            doc = self.get_document(file_name)
+            compact_doc = self.get_document(file_name, keep_json=False)
+            self.assertIsNone(compact_doc.json)
+            self.assertEqual(compact_doc.to_text(include_duplicates=True), doc.to_text(include_duplicates=True))
+            self.assertEqual(compact_doc.to_html(include_duplicates=True), doc.to_html(include_duplicates=True))
+            self.assertEqual([c.to_context_text() for c in compact_doc.chunks()], [c.to_context_text() for c in doc.chunks()])
+            for chunk in compact_doc.chunks():
+                self.assertIsNone(chunk.block_json)
+                self.assertIsInstance(chunk.sentences, tuple)
+            # applications can still keep their own data on blocks
+            chunk = compact_doc.chunks()[0]
+            chunk.embedding = [0.1, 0.2]
+            self.assertEqual(chunk.embedding, [0.1, 0.2])
+
+    def test_iter_preorder_postorder(self):
+        doc = self.read_layout("nested_list_test.json")
+        preorder = []
+        def visit(node):
+            for child in node.children:
+                preorder.append(child)
+                visit(child)
+        visit(doc)
+        self.assertEqual(list(doc.iter_preorder()), preorder)
+        self.assertEqual(sorted(map(id, doc.iter_postorder())), sorted(map(id, preorder)))
+        for node in doc.iter_postorder():
+            for child in node.children:
+                self.assertLess(list(doc.iter_postorder()).index(child), list(doc.iter_postorder()).index(node))
+        self.assertEqual(list(doc.iter_preorder(tags=['para'])), [n for n in preorder if n.tag == 'para'])
+        top_only = list(doc.iter_preorder(descend=lambda node: False))
+        self.assertEqual(top_only, doc.children)
+
+    def test_deeply_nested_list(self):
+        blocks = [{"tag": "header", "level": 0, "sentences": ["Article I"]}]
+        blocks += [{"tag": "list_item", "level": level, "sentences": [f"Item {level}"]} for level in range(1, 3001)]
+        doc = Document(blocks)
+        self.assertEqual(len(list(doc.root_node.iter_preorder())), 3001)
+        self.assertEqual(len(doc.chunks()), 1)
+        self.assertEqual(doc.sections()[0].title, "Article I")
+        items = "\n".join(f"Item {level}" for level in range(1, 3001))
+        self.assertEqual(doc.to_text(), "Article I\n" + items + "\n")
+        html = doc.to_html()
+        self.assertTrue(html.startswith("<html><h1>Article I</h1><li>Item 1<ul><li>Item 2<ul>"))
+        self.assertTrue(html.endswith("<li>Item 3000</li>" + "</ul></li>" * 2999 + "</html>"))
+        chunk = doc.chunks()[0]
+        self.assertEqual(chunk.to_context_text(), "Article I\n" + items)
+        packed = doc.pack_chunks(max_size=100000)
+        self.assertEqual([p.text for p in packed], [items])
+
+    def test_iter_chunks(self):
+        for file_name in ["chunk_test.json", "nested_list_test.json", "table_test.json", "ooo_header_child_test.json", "list_test.json"]:
+            doc = self.read_layout(file_name)
+            with open(os.path.join(os.path.dirname(__file__), file_name)) as f:
+                blocks = json.load(f)
+            chunks = list(LayoutReader().iter_chunks(blocks))
+            self.assertEqual([c.to_context_text() for c, _ in chunks], [c.to_context_text() for c in doc.chunks()])
+            for chunk, sections in chunks:
+                self.assertEqual(sections, [p for p in chunk.parent_chain() if p.tag == 'header'])
+
+    def test_iter_chunks_is_incremental(self):
+        with open(os.path.join(os.path.dirname(__file__), "chunk_test.json")) as f:
+            blocks = json.load(f)
+        consumed = []
+        def block_source():
+            for block in blocks:
+                consumed.append(block)
+                yield block
+        chunk, sections = next(LayoutReader().iter_chunks(block_source()))
+        self.assertEqual(chunk.to_text(include_children=True, recurse=True), "Section 1\n1.1 One point one\n1.2 One point two")
+        self.assertEqual([s.title for s in sections], ["Article I"])
+        self.assertLess(len(consumed), len(blocks))
+
+    def test_pack_chunks(self):
+        doc = self.get_document("nested_list_test.json")
+        chunks = doc.chunks()
+        texts = [c.to_text(include_children=True, recurse=True) for c in chunks]
+        packed = doc.pack_chunks(max_size=10 ** 6)
+        self.assertEqual("\n".join(p.text for p in packed), "\n".join(texts))
+        self.assertLess(len(packed), len(chunks))
+        for p in packed:
+            self.assertTrue(all(b.parent is p.blocks[0].parent for b in p.blocks))
+            self.assertEqual(p.context, p.blocks[0].parent_text())
+            self.assertEqual(p.size, len(p.text))
+        packed = doc.pack_chunks(max_size=1)
+        self.assertEqual([p.text for p in packed], texts)
+        self.assertEqual(packed[0].to_context_text(), chunks[0].to_context_text())
+
+    def test_pack_chunks_splits_tables(self):
+        doc = self.get_document("table_test.json")
+        table = doc.tables()[0]
+        header_text = table.headers[0].to_text() + "\n"
+        max_size = len(header_text) + 2 * len(table.rows[0].to_text()) + 10
+        packed = [p for p in doc.pack_chunks(max_size=max_size) if p.blocks == [table]]
+        self.assertGreater(len(packed), 1)
+        for p in packed:
+            self.assertTrue(p.text.startswith(header_text))
+            self.assertLessEqual(p.size, max_size)
+        rows_text = "".join(p.text[len(header_text):] for p in packed)
+        self.assertEqual(header_text + rows_text, table.to_text())
+
+    def test_top_sections(self):
+        for file_name in ["header_test.json", "ooo_header_test.json", "ooo_header_child_test.json", "nested_list_test.json"]:
+            doc = self.get_document(file_name)
+            sections = doc.sections()
+            expected = [s for s in sections if not any(s in other.children for other in sections)]
+            self.assertEqual(doc.top_sections, expected)
+        doc = self.get_document("ooo_header_test.json")
+        self.assertEqual([s.title for s in doc.top_sections], [s.title for s in doc.root_node.children])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import unittest
+import os
+import tempfile
+import time
+from llmsherpa.readers import ParseCache
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_key(self):
+        cache = ParseCache(self.tmp_dir.name)
+        url = "http://localhost:5001/api/parseDocument?renderFormat=all&useNewIndentParser=true"
+        reordered_url = "http://localhost:5001/api/parseDocument?useNewIndentParser=true&renderFormat=all"
+        self.assertEqual(cache.key(b"pdf", url), cache.key(b"pdf", reordered_url))
+        self.assertNotEqual(cache.key(b"pdf", url), cache.key(b"pdf2", url))
+        self.assertNotEqual(cache.key(b"pdf", url), cache.key(b"pdf", "http://localhost:5001/api/parseDocument"))
+
+    def test_get_put(self):
+        cache = ParseCache(self.tmp_dir.name)
+        blocks = [{"tag": "para", "sentences": ["Some text"], "level": 0}]
+        key = cache.key(b"pdf", "http://localhost/api")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, blocks)
+        self.assertEqual(cache.get(key), blocks)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.clear()
+        self.assertIsNone(cache.get(key))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def test_max_age(self):
+        cache = ParseCache(self.tmp_dir.name, max_age_seconds=60)
+        key = cache.key(b"pdf", "http://localhost/api")
+        cache.put(key, [])
+        path = cache._path(key)
+        old = time.time() - 120
+        os.utime(path, (old, old))
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(os.path.exists(path))
+
+    def test_max_size(self):
+        cache = ParseCache(self.tmp_dir.name)
+        blocks = [{"tag": "para", "sentences": [f"Sentence {i}" for i in range(100)]}]
+        keys = [cache.key(str(i).encode("utf-8"), "http://localhost/api") for i in range(4)]
+        for i, key in enumerate(keys):
+            cache.put(key, blocks)
+            accessed = time.time() - 100 + i
+            os.utime(cache._path(key), (accessed, accessed))
+        entry_size = os.path.getsize(cache._path(keys[0]))
+        cache.max_size_bytes = 2 * entry_size
+        cache.evict()
+        self.assertEqual(cache.size(), 2 * entry_size)
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.get(keys[3]), blocks)
+    def test_put_evicts_without_scanning_every_time(self):
+        blocks = [{"tag": "para", "sentences": [f"Sentence {i}" for i in range(100)]}]
+        cache = ParseCache(self.tmp_dir.name)
+        cache.put(cache.key(b"size", "http://localhost/api"), blocks)
+        entry_size = cache.size()
+        cache.clear()
+        cache = ParseCache(self.tmp_dir.name, max_size_bytes=10 * entry_size)
+        scans = []
+        entries = cache._entries
+        def counting_entries():
+            scans.append(1)
+            return entries()
+        cache._entries = counting_entries
+        for i in range(25):
+            cache.put(cache.key(str(i).encode("utf-8"), "http://localhost/api"), blocks)
+            self.assertLessEqual(cache._size, 10 * entry_size)
+        # the first put counts the entries, then every eviction goes down to 9 entries so only every other put over the limit scans
+        self.assertLessEqual(len(scans), 9)
+        self.assertEqual(cache.size(), cache._size)
+
+    def test_put_sweeps_expired_entries(self):
+        cache = ParseCache(self.tmp_dir.name, max_age_seconds=60)
+        old_key = cache.key(b"old", "http://localhost/api")
+        cache.put(old_key, [])
+        old = time.time() - 120
+        os.utime(cache._path(old_key), (old, old))
+        # no sweep until a quarter of max_age_seconds has passed since the last one
+        cache.put(cache.key(b"new", "http://localhost/api"), [])
+        self.assertTrue(os.path.exists(cache._path(old_key)))
+        cache._last_sweep -= 15
+        cache.put(cache.key(b"newer", "http://localhost/api"), [])
+        self.assertFalse(os.path.exists(cache._path(old_key)))
+        self.assertEqual(len(cache._entries()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import json
+import os
+import pickle
+import tempfile
+from llmsherpa.readers import Document, ParseCache
+from llmsherpa.readers import render_document, render_documents
+
+
+class TestRenderPipeline(unittest.TestCase):
+
+    def load_blocks(self, file_name):
+        with open(os.path.join(os.path.dirname(__file__), file_name)) as f:
+            return json.load(f)
+
+    def test_render_document(self):
+        blocks = self.load_blocks("chunk_test.json")
+        doc = Document(blocks)
+        rendered = render_document(json.dumps({"return_dict": {"result": {"blocks": blocks}}}), include_text=True)
+        self.assertEqual([c.context_text for c in rendered.chunks], [c.to_context_text() for c in doc.chunks()])
+        self.assertEqual([c.block_idx for c in rendered.chunks], [c.block_idx for c in doc.chunks()])
+        self.assertEqual(rendered.chunks[3].sections, [s.title for s in doc.chunks()[3].sections_path()])
+        self.assertEqual(rendered.top_sections, [s.title for s in doc.top_sections])
+        self.assertEqual(rendered.text, doc.to_text())
+        self.assertIsNone(rendered.html)
+        self.assertEqual(pickle.loads(pickle.dumps(rendered)), rendered)
+
+    def test_render_documents(self):
+        payloads = [self.load_blocks(name) for name in ["chunk_test.json", "table_test.json", "list_test.json"]]
+        payloads.insert(1, b"not json")
+        results = list(render_documents(iter(payloads), max_workers=2, chunksize=2, include_html=True))
+        self.assertEqual([r.index for r in results], [0, 1, 2, 3])
+        self.assertIsInstance(results[1].error, ValueError)
+        self.assertIsNone(results[1].document)
+        for result, payload in zip(results, payloads):
+            if result.error is None:
+                self.assertEqual(result.document, render_document(payload, include_html=True))
+
+    def test_render_documents_from_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ParseCache(cache_dir)
+            blocks = self.load_blocks("chunk_test.json")
+            key = cache.key(b"pdf", "http://localhost/api")
+            cache.put(key, blocks)
+            results = list(render_documents([key, "missing"], max_workers=1, cache=cache))
+        self.assertEqual(results[0].document, render_document(blocks))
+        self.assertIsInstance(results[1].error, KeyError)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import json
+import os
+from llmsherpa.readers import Block, Document, SpatialIndex
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def get_document(self, file_name):
+        with open(os.path.join(os.path.dirname(__file__), file_name)) as f:
+            return Document(json.load(f))
+
+    def test_spatial_index(self):
+        doc = self.get_document("chunk_test.json")
+        blocks = doc.index.blocks
+        # a grid of 4 columns with a box spanning the first row over every block
+        for i, block in enumerate(blocks):
+            block.page_idx = 0
+            block.bbox = [100.0 * (i % 4), 20.0 * (i // 4), 100.0 * (i % 4) + 90, 20.0 * (i // 4) + 15]
+        blocks[-1].bbox = [0.0, 0.0, 400.0, 15.0]
+        self.assertEqual(doc.blocks_on_page(0), blocks)
+        self.assertEqual(doc.blocks_on_page(1), [])
+        self.assertEqual(doc.blocks_in_region(0, (95, 0, 195, 30)), [blocks[1], blocks[5], blocks[-1]])
+        self.assertEqual(doc.blocks_in_region(0, (-10, -10, -5, -5)), [])
+        self.assertIs(doc.block_at(0, 150, 25), blocks[5])
+        self.assertIs(doc.block_at(0, 150, 5), blocks[1])
+        self.assertIs(doc.block_at(0, 395, 5), blocks[-1])
+        self.assertIsNone(doc.block_at(0, 95, 25))
+        self.assertIsNone(doc.block_at(3, 0, 0))
+
+    def test_spatial_index_large_page(self):
+        blocks = [Block({"page_idx": 0, "bbox": [i % 30, i // 30, i % 30 + 0.5, i // 30 + 0.5]}) for i in range(900)]
+        index = SpatialIndex(blocks)
+        region = (3.2, 5.2, 10.4, 20.1)
+        expected = [b for b in blocks if b.bbox[0] <= region[2] and b.bbox[2] >= region[0] and b.bbox[1] <= region[3] and b.bbox[3] >= region[1]]
+        self.assertEqual(len(expected), 8 * 16)
+        self.assertEqual(index.blocks_in_region(0, region), expected)
+        self.assertIs(index.block_at(0, 12.25, 7.25), blocks[7 * 30 + 12])
+
+if __name__ == '__main__':
+    unittest.main()
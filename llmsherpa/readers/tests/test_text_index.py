@@ -0,0 +1,85 @@
+import unittest
+import json
+import os
+from llmsherpa.readers import Document, TextIndex
+
+
+class TestTextIndex(unittest.TestCase):
+
+    def get_document(self, file_name):
+        with open(os.path.join(os.path.dirname(__file__), file_name)) as f:
+            return Document(json.load(f))
+
+    def test_text_index(self):
+        with open(os.path.join(os.path.dirname(__file__), "chunk_test.json")) as f:
+            blocks_json = json.load(f)
+        doc = Document(blocks_json, text_index=True)
+        hits = doc.text_index.search("Point")
+        self.assertEqual([h.block for h in hits], [b for b in doc.index.blocks if "point" in b.to_text().lower()])
+        self.assertIs(hits[0].document, doc)
+        self.assertEqual(hits[0].parent_chain, hits[0].block.parent_chain())
+        self.assertEqual(hits[0].block.sentences[hits[0].sentence_idx], "1.1 One point one")
+        texts = [h.block.to_text() for h in doc.text_index.search_phrase("two point ONE")]
+        self.assertEqual(texts, [b.to_text() for b in doc.index.blocks if "two point one" in b.to_text().lower()])
+        self.assertIn("1.2.1 One point two point one", texts)
+        self.assertEqual(doc.text_index.search_phrase("one two"), [])
+        self.assertEqual([h.block.to_text() for h in doc.text_index.search_prefix("artic")], ["Article I", "Article II"])
+        # the index built on first access finds the same blocks
+        lazy_doc = Document(blocks_json)
+        self.assertEqual([h.block.to_text() for h in lazy_doc.text_index.search("point")], [h.block.to_text() for h in hits])
+
+    def test_text_index_tables_and_merge(self):
+        table_doc = self.get_document("table_test.json")
+        chunk_doc = self.get_document("chunk_test.json")
+        hits = table_doc.text_index.search_phrase("SQuAD 2.0")
+        self.assertEqual([h.block for h in hits], table_doc.tables())
+        merged = TextIndex.merge([chunk_doc.text_index, table_doc.text_index])
+        self.assertEqual(len(merged.blocks), len(chunk_doc.index.blocks) + len(table_doc.index.blocks))
+        self.assertEqual(merged.search_phrase("SQuAD 2.0"), hits)
+        point_hits = merged.search("point")
+        self.assertEqual(point_hits, chunk_doc.text_index.search("point"))
+        self.assertTrue(all(h.document is chunk_doc for h in point_hits))
+        # merged indexes can be merged again
+        self.assertEqual(TextIndex.merge([TextIndex(), merged]).search_phrase("SQuAD 2.0"), hits)
+
+    def test_text_index_phrases_match_positions(self):
+        doc = self.get_document("chunk_test.json")
+        sentences = [(block, i, sentence) for block in doc.index.blocks for i, sentence in enumerate(block.sentences)]
+        for phrase in ["one point", "point one", "point two point one", "article ii", "one one", "two point"]:
+            tokens = TextIndex.tokenize(phrase)
+            expected = []
+            for block, i, sentence in sentences:
+                words = TextIndex.tokenize(sentence)
+                if any(words[j:j + len(tokens)] == tokens for j in range(len(words))):
+                    expected.append((block, i))
+            self.assertEqual([(h.block, h.sentence_idx) for h in doc.text_index.search_phrase(phrase)], expected)
+        # words next to each other in different sentences are not a phrase
+        para_doc = Document([{"tag": "para", "level": 0, "sentences": ["one two", "three four"]}])
+        self.assertEqual(para_doc.text_index.search_phrase("two three"), [])
+        self.assertEqual([h.sentence_idx for h in para_doc.text_index.search_phrase("three four")], [1])
+
+    def test_text_index_keeps_tables_lazy(self):
+        with open(os.path.join(os.path.dirname(__file__), "table_test.json")) as f:
+            blocks_json = json.load(f)
+        for keep_json in [True, False]:
+            doc = Document(blocks_json, keep_json=keep_json, text_index=True)
+            table = doc.tables()[0]
+            hits = doc.text_index.search_phrase("SQuAD 2.0 EM")
+            self.assertEqual([h.block for h in hits], [table])
+            self.assertIsNone(table._rows)
+            row_texts = table._row_texts()
+            self.assertEqual(row_texts, [row.to_text() for row in table.headers + table.rows])
+            self.assertEqual(row_texts[hits[0].sentence_idx], table.headers[0].to_text())
+
+    def test_text_index_merge_part_boundary(self):
+        first_doc = self.get_document("chunk_test.json")
+        second_doc = self.get_document("chunk_test.json")
+        merged = TextIndex.merge([first_doc.text_index, TextIndex(), second_doc.text_index])
+        hits = merged.search("article")
+        # "Article I" is the first block of each document
+        self.assertIs(hits[0].block, first_doc.index.blocks[0])
+        self.assertIs(hits[len(hits) // 2].block, second_doc.index.blocks[0])
+        self.assertEqual([h.document for h in hits], [first_doc] * (len(hits) // 2) + [second_doc] * (len(hits) // 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import array
+import bisect
+import re
+from collections import namedtuple
+
+TextHit = namedtuple("TextHit", ["document", "block", "sentence_idx", "parent_chain"])
+TextHit.__doc__ = """
+A match returned by a TextIndex lookup
+
+Attributes
+----------
+document: Document
+    document the block is in, None if the index was not built for a document
+block: Block
+    block with the match
+sentence_idx: int
+    index of the matching sentence in the sentences of the block, for tables the index of the matching row with the headers first
+parent_chain: list
+    parent chain of the block as returned by Block.parent_chain
+"""
+
+_TOKEN = re.compile(r"\w+")
+
+def _contains(occurrences, block_no, sentence_idx, position):
+    # binary search of the (block number, sentence index, word position) triples, they are kept sorted as blocks are only ever appended
+    key = (block_no, sentence_idx, position)
+    lo = 0
+    hi = len(occurrences) // 3
+    while lo < hi:
+        mid = (lo + hi) // 2
+        i = mid * 3
+        if (occurrences[i], occurrences[i + 1], occurrences[i + 2]) < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    i = lo * 3
+    return i < len(occurrences) and occurrences[i] == block_no and occurrences[i + 1] == sentence_idx and occurrences[i + 2] == position
+
+class TextIndex:
+    """
+    Inverted index from the words of the sentences of blocks to where they occur. Words are lower cased runs of letters and digits.
+    The occurrences of a word are kept in an array of (block number, sentence index, word position) triples, so word, phrase and prefix lookups do not have to read the text again.
+    Blocks are normally added by LayoutReader.read while the tree is built, see Document.text_index. Indexes of several documents can be combined with merge.
+
+    Parameters
+    ----------
+    document: Document
+        document the blocks belong to, returned in the hits
+    """
+    def __init__(self, document=None):
+        self.document = document
+        self.blocks = []
+        self.postings = {}
+        self._vocabulary = None
+        # first block number and document of every index merged into this one
+        self._part_starts = None
+        self._part_documents = None
+
+    @staticmethod
+    def tokenize(text):
+        """
+        Returns the lower cased words of the text.
+        """
+        return _TOKEN.findall(text.lower())
+
+    def _sentences(self, block):
+        # tables are read from the json of their rows when the rows were not built yet, so indexing keeps them lazy
+        if block.tag == 'table':
+            return block._row_texts()
+        return block.sentences
+
+    def add_block(self, block):
+        """
+        Adds the sentences of a block to the index. A table is added as the text of its rows.
+        """
+        block_no = len(self.blocks)
+        self.blocks.append(block)
+        postings = self.postings
+        for sentence_idx, sentence in enumerate(self._sentences(block)):
+            for position, token in enumerate(_TOKEN.findall(sentence.lower())):
+                occurrences = postings.get(token)
+                if occurrences is None:
+                    occurrences = postings[token] = array.array('i')
+                occurrences.extend((block_no, sentence_idx, position))
+        self._vocabulary = None
+
+    def _hits(self, matches):
+        hits = []
+        for block_no, sentence_idx in sorted(set(matches)):
+            block = self.blocks[block_no]
+            if self._part_starts is None:
+                document = self.document
+            else:
+                document = self._part_documents[bisect.bisect_right(self._part_starts, block_no) - 1]
+            hits.append(TextHit(document, block, sentence_idx, block.parent_chain()))
+        return hits
+
+    def _sentence_matches(self, token):
+        occurrences = self.postings.get(token, ())
+        return zip(occurrences[0::3], occurrences[1::3])
+
+    def search(self, term):
+        """
+        Returns the sentences that contain the word, as a list of TextHit in the order the blocks were added.
+        """
+        return self._hits(self._sentence_matches(term.lower()))
+
+    def search_phrase(self, phrase):
+        """
+        Returns the sentences that contain the words of the phrase next to each other, as a list of TextHit in the order the blocks were added.
+        Phrases are matched with the word positions of the postings, starting from the occurrences of the rarest word, so no text is read again.
+        """
+        tokens = self.tokenize(phrase)
+        if not tokens:
+            return []
+        if len(tokens) == 1:
+            return self.search(tokens[0])
+        occurrences = [self.postings.get(token) for token in tokens]
+        if any(o is None for o in occurrences):
+            return []
+        rarest = min(range(len(tokens)), key=lambda i: len(occurrences[i]))
+        rarest_occurrences = occurrences[rarest]
+        # the other words are looked up from the rarest to the most common one so mismatches are found early
+        others = sorted((i for i in range(len(tokens)) if i != rarest), key=lambda i: len(occurrences[i]))
+        matches = []
+        for j in range(0, len(rarest_occurrences), 3):
+            block_no, sentence_idx, position = rarest_occurrences[j:j + 3]
+            start = position - rarest
+            if start >= 0 and all(_contains(occurrences[i], block_no, sentence_idx, start + i) for i in others):
+                matches.append((block_no, sentence_idx))
+        return self._hits(matches)
+
+    def search_prefix(self, prefix):
+        """
+        Returns the sentences that contain a word starting with prefix, as a list of TextHit in the order the blocks were added.
+        """
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        matches = []
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.extend(self._sentence_matches(token))
+        return self._hits(matches)
+
+    @classmethod
+    def merge(cls, indexes):
+        """
+        Returns a new index with the blocks of all the indexes, e.g. the text indexes of a batch of documents. Hits keep the document of the index they came from. The words are not tokenized again.
+        """
+        merged = cls()
+        merged._part_starts = []
+        merged._part_documents = []
+        for index in indexes:
+            offset = len(merged.blocks)
+            if index._part_starts is None:
+                merged._part_starts.append(offset)
+                merged._part_documents.append(index.document)
+            else:
+                merged._part_starts.extend(offset + start for start in index._part_starts)
+                merged._part_documents.extend(index._part_documents)
+            merged.blocks.extend(index.blocks)
+            for token, occurrences in index.postings.items():
+                if offset:
+                    occurrences = array.array('i', occurrences)
+                    for i in range(0, len(occurrences), 3):
+                        occurrences[i] += offset
+                merged_occurrences = merged.postings.get(token)
+                if merged_occurrences is None:
+                    merged.postings[token] = array.array('i', occurrences)
+                else:
+                    merged_occurrences.extend(occurrences)
+        return merged
@@ -14,6 +14,11 @@ setup(
     install_requires=[
         "urllib3"
     ],
+    extras_require={
+        "async": ["aiohttp"],
+        "numpy": ["numpy"],
+        "shard": ["pypdf"],
+    },
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'Development Status :: 1 - Planning',